@@ -0,0 +1,121 @@
+import json
+import time
+import tracemalloc
+
+
+class CommandStats:
+    """Счётчики одной команды: число вызовов, время, гистограмма задержек и выделения памяти."""
+    __slots__ = ("count", "seconds", "max_seconds", "buckets", "allocated", "max_allocated")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = {}  # Верхняя граница корзины в мкс (степень двойки) -> число вызовов
+        self.allocated = 0  # Сумма пиковых выделений памяти за вызов, байт
+        self.max_allocated = 0
+
+    def add(self, seconds, allocated=None):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        bound = 1 << int(seconds * 1e6).bit_length()
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+        if allocated is not None:
+            self.allocated += allocated
+            self.max_allocated = max(self.max_allocated, allocated)
+
+    def percentile(self, fraction):
+        """Верхняя граница корзины (мкс), в которую попадает доля fraction вызовов."""
+        seen = 0
+        for bound in sorted(self.buckets):
+            seen += self.buckets[bound]
+            if seen >= fraction * self.count:
+                return bound
+        return 0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "seconds": self.seconds,
+            "mean_us": self.seconds / self.count * 1e6 if self.count else 0.0,
+            "max_us": self.max_seconds * 1e6,
+            "p50_us": self.percentile(0.5),
+            "p99_us": self.percentile(0.99),
+            "histogram_us": {str(bound): count for bound, count in sorted(self.buckets.items())},
+            "allocated_bytes": self.allocated,
+            "max_allocated_bytes": self.max_allocated,
+        }
+
+
+class Instrumentation:
+    """Сбор статистики эмулятора: задержки и память команд, время загрузки и разбора архива, вывода в GUI.
+
+    Включается настройкой [stats] enabled = true или флагом --stats; при allocations = true
+    выделения памяти считаются через tracemalloc (заметно замедляет выполнение).
+    """
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.commands = {}  # Имя команды -> CommandStats
+        self.phases = {}  # Этап (vfs_load, vfs_expand, render) -> CommandStats
+        self.started = time.perf_counter()
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def run(self, name, handler, *args):
+        """Вызов handler(*args) с замером времени (и памяти) под именем команды name."""
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        if self.allocations:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            return handler(*args)
+        finally:
+            seconds = time.perf_counter() - start
+            stats.add(seconds, tracemalloc.get_traced_memory()[1] - base if self.allocations else None)
+
+    def phase(self, name, seconds):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = CommandStats()
+        stats.add(seconds)
+
+    def timed(self, name, func):
+        """Обёртка func, записывающая время каждого вызова как этап name."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.phase(name, time.perf_counter() - start)
+        return wrapper
+
+    def to_dict(self):
+        return {
+            "uptime_seconds": time.perf_counter() - self.started,
+            "commands": {name: stats.to_dict() for name, stats in sorted(self.commands.items())},
+            "phases": {name: stats.to_dict() for name, stats in sorted(self.phases.items())},
+        }
+
+    def format(self):
+        """Текстовая сводка для команды stats."""
+        lines = []
+        for title, table in (("command", self.commands), ("phase", self.phases)):
+            for name, stats in sorted(table.items()):
+                if not stats.count:  # Выполняющаяся сейчас команда stats
+                    continue
+                line = (f"{title} {name}: {stats.count} calls, total {stats.seconds * 1e3:.3f} ms, "
+                        f"mean {stats.seconds / stats.count * 1e6:.1f} us, p50 <= {stats.percentile(0.5)} us, "
+                        f"p99 <= {stats.percentile(0.99)} us, max {stats.max_seconds * 1e6:.1f} us")
+                if self.allocations and title == "command":
+                    line += f", peak alloc {stats.max_allocated} B"
+                lines.append(line)
+        return "\n".join(lines) or "No statistics collected yet"
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -1,164 +1,368 @@
-import zipfile
+import argparse
+import importlib
 import os
+import posixpath
+import sys
+import time
+import zipfile
 import toml
-import shutil
-import tkinter as tk
-from tkinter import scrolledtext, messagebox
+from collections import deque
+from instrumentation import Instrumentation
+from vfs import RESOLVE_CACHE_SIZE, MappedZip, Overlay, PathResolver, find, iter_lines
+
+try:
+    import tkinter as tk
+    from tkinter import scrolledtext
+except ImportError:  # Без Tk доступен только пакетный режим
+    tk = None
+
+OUTPUT_FRAME_MS = 16  # Интервал обновления области вывода GUI (один кадр)
+HISTORY_CAPACITY = 1000  # Число хранимых в памяти команд истории по умолчанию
+OUTPUT_CAPACITY = 10000  # Число хранимых в памяти сообщений вывода по умолчанию
+
+COMMANDS = {}  # Имя команды -> обработчик handler(shell, args)
+
+
+def command(*names):
+    """Декоратор регистрации встроенной команды под одним или несколькими именами."""
+    def register(handler):
+        for name in names:
+            COMMANDS[name] = handler
+        return handler
+    return register
+
+
+class RingBuffer(deque):
+    """Ограниченный буфер последних capacity элементов (None - без ограничения)."""
+
+    def __init__(self, capacity=None):
+        super().__init__(maxlen=capacity)
+
+    def close(self):
+        pass
+
+
+class SpillBuffer(RingBuffer):
+    """RingBuffer, дописывающий вытесняемые элементы в файл spill_path по одному на строку."""
+
+    def __init__(self, capacity, spill_path):
+        super().__init__(capacity)
+        self.spill_path = spill_path
+        self.spill_file = None
+
+    def append(self, item):
+        if len(self) == self.maxlen:
+            if self.spill_file is None:
+                self.spill_file = open(self.spill_path, 'a', encoding='utf-8')
+            self.spill_file.write(f"{self[0]}\n")
+        super().append(item)
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+
+
+def ring_buffer(capacity=None, spill_path=None):
+    """Буфер истории или вывода: с вытеснением в файл, если задан spill_path."""
+    return SpillBuffer(capacity, spill_path) if spill_path else RingBuffer(capacity)
+
+
+def read_config(config_path):
+    with open(config_path, 'r') as f:
+        return toml.load(f)
 
 
 class ShellEmulator:
-    def __init__(self, config_path):
+    def __init__(self, config_path, stream=None, archive=None):
         self.load_config(config_path)
+        self.stats = Instrumentation(self.stats_allocations) if self.stats_enabled else None
         self.cwd = '/'  # Текущая рабочая директория
-        self.history = []  # История команд
-        self.output = []  # Список для хранения вывода
-        self.load_virtual_fs()  # Загрузка виртуальной файловой системы
+        self.history = ring_buffer(self.history_capacity, self.history_spill)  # История команд
+        self.output = ring_buffer(self.output_capacity, self.output_spill)  # Последние сообщения вывода
+        self.commands = dict(COMMANDS)  # Таблица команд этого эмулятора, расширяется плагинами
+        self.stream = stream  # Поток вывода пакетного режима
+        self.pending_output = []  # Вывод, ещё не показанный в GUI
+        self.load_virtual_fs(archive)  # Загрузка виртуальной файловой системы
         self.current_directory = "/"
+        for module in self.plugins:
+            importlib.import_module(module).register(self)
 
     def load_config(self, config_path):
-        with open(config_path, 'r') as f:
-            config = toml.load(f)
-            self.computer_name = config['computer']['name']
-            self.zip_path = config['filesystem']['path']
-            self.startup_script = config['startup']['script']
+        """Загрузка настроек из TOML-файла или уже разобранного словаря (общего для нескольких сессий)."""
+        config = config_path if isinstance(config_path, dict) else read_config(config_path)
+        self.computer_name = config['computer']['name']
+        self.zip_path = config['filesystem']['path']
+        self.startup_script = config['startup']['script']
+        limits = config.get('limits', {})
+        self.history_capacity = limits.get('history', HISTORY_CAPACITY) or None  # 0 - без ограничения
+        self.output_capacity = limits.get('output', OUTPUT_CAPACITY) or None
+        self.history_spill = limits.get('history_spill')
+        self.output_spill = limits.get('output_spill')
+        self.resolve_cache = limits.get('resolve_cache', RESOLVE_CACHE_SIZE)
+        self.plugins = config.get('plugins', {}).get('modules', [])
+        stats = config.get('stats', {})
+        self.stats_enabled = stats.get('enabled', False)
+        self.stats_allocations = stats.get('allocations', False)
+        self.stats_dump = stats.get('dump')  # JSON-файл статистики, записываемый при выходе
 
-    def load_virtual_fs(self):
-        self.zip_file = zipfile.ZipFile(self.zip_path, 'r')
-        self.files = self.zip_file.namelist()
+    def register_command(self, name, handler):
+        """Добавление или замена команды name; handler(shell, args) получает аргументы после имени."""
+        self.commands[name] = handler
+
+    def load_virtual_fs(self, archive=None):
+        """Открытие архива (или подключение к общему archive) с собственным слоем изменений."""
+        start = time.perf_counter()
+        if archive is None:
+            archive = MappedZip(self.zip_path)  # Каталоги разбираются при первом обращении
+            if self.stats is not None:
+                archive.expand = self.stats.timed('vfs_expand', archive.expand)
+        self.archive = archive
+        if self.stats is not None:
+            self.stats.phase('vfs_load', time.perf_counter() - start)
+        self.overlay = Overlay(self.archive)  # Изменения хранятся в памяти до команды sync
+        self.resolver = PathResolver(self.overlay, self.resolve_cache)
+        self.cwd_node = self.root
+
+    @property
+    def root(self):
+        return self.overlay.root
 
     def initialize(self):
         self.run_startup_script()  # Запуск стартового скрипта после инициализации GUI
 
     def run_startup_script(self):
-        try:
-            with self.zip_file.open(self.startup_script) as f:
-                for line in f:
-                    command = line.decode('utf-8').strip()
-                    if command:
-                        self.execute_command(command)
-        except KeyError:
+        if self.root.pending is not None:  # Корень не раскрыт: скрипт ищется без разбора всего каталога
+            node = self.archive.find_file(self.startup_script)
+        else:
+            node = find(self.root, self.startup_script)
+        if node is None or node.is_dir:
             self.show_output(f"Startup script '{self.startup_script}' not found in zip file.")
+            return
+        self.run_script(line.decode('utf-8') for line in iter_lines(self.archive.iter_content(node)))
+
+    def run_script(self, lines):
+        """Выполнение команд из итерируемого набора строк (файл, stdin), пустые строки пропускаются."""
+        for line in lines:
+            command = line.strip()
+            if command:
+                self.execute_command(command)
 
     def execute_command(self, command):
-        self.history.append(command)
         parts = command.split()
-
-        if parts[0] == 'ls':
-            self.ls()
-        elif parts[0] == 'cd':
-            self.cd(parts[1] if len(parts) > 1 else '.')
-        elif parts[0] == 'exit':
-            self.exit_shell()
-        elif parts[0] == 'rm':
-            if len(parts) > 1:
-                self.rm(parts[1])
-            else:
-                self.show_output("Usage: rm <file>")
-        elif parts[0] == 'rmdir':
-            if len(parts) > 1:
-                self.rmdir(parts[1])
-            else:
-                self.show_output("Usage: rmdir <directory>")
-        elif parts[0] == 'history':
-            self.show_history()
-        else:
+        if not parts:
+            return
+        self.history.append(command)
+        handler = self.commands.get(parts[0])
+        if handler is None:
             self.show_output(f"Command '{parts[0]}' not found")
-
-    def ls(self):
-        if self.cwd == '/':
-            cwd_with_slash = ''
+        elif self.stats is None:
+            handler(self, parts[1:])
         else:
-            cwd_with_slash = self.cwd.rstrip('/') + '/'
-
-        items = set()
-        for file in self.files:
-            if file.startswith(cwd_with_slash) and file != cwd_with_slash:
-                relative_path = file[len(cwd_with_slash):].strip('/')
-                if '/' in relative_path:
-                    directory = relative_path.split('/')[0]
-                    items.add(directory + '/')
-                else:
-                    items.add(relative_path)
+            self.stats.run(parts[0], handler, self, parts[1:])
 
+    def ls(self):
+        items = self.cwd_node.listing()
         if items:
-            self.show_output("\n".join(sorted(items)))
+            self.show_output("\n".join(items))
         else:
             self.show_output("Directory is empty")
 
     def cd(self, path):
-        if path == '..':
-            self.cwd = os.path.dirname(self.cwd.rstrip('/'))
-            if not self.cwd:
-                self.cwd = '/'
-        else:
-            new_path = os.path.join(self.cwd.rstrip('/'), path).lstrip('/')
-            if any(file.startswith(new_path + '/') for file in self.files):
-                self.cwd = new_path
+        canonical, node = self.resolver.resolve(self.cwd, path)
+        if node is not None and node.is_dir:
+            self.cwd_node = node
+            self.cwd = canonical or '/'
+            if path != '..':
                 self.show_output(f"Changed directory to {self.cwd}")
-            else:
-                self.show_output(f"Directory '{path}' not found")
+        else:
+            self.show_output(f"Directory '{path}' not found")
+
+    def lookup(self, path):
+        """Узел по пути относительно текущей директории (None, если его нет)."""
+        return self.resolver.resolve(self.cwd, path)[1]
 
     def rm(self, path):
-        full_path = os.path.join(self.cwd, path)
-        try:
-            os.remove(full_path)
-            self.show_output(f"Removed file {full_path}")
-        except FileNotFoundError:
-            self.show_output(f"File '{full_path}' not found")
-        except IsADirectoryError:
-            self.show_output(f"'{full_path}' is a directory. Use 'rmdir' to remove directories.")
-        except Exception as e:
-            self.show_output(f"Error removing file '{full_path}': {e}")
+        canonical, node = self.resolver.resolve(self.cwd, path)
+        if node is None or node is self.root:
+            self.show_output(f"File '/{canonical}' not found")
+        elif node.is_dir:
+            self.show_output(f"'/{canonical}' is a directory. Use 'rmdir' to remove directories.")
+        else:
+            self.overlay.remove(node)
+            self.cwd_node = self.lookup('.')  # Каталог мог быть скопирован слоем
+            self.show_output(f"Removed file /{canonical}")
 
     def rmdir(self, path):
-        full_path = os.path.join(self.cwd, path)
+        canonical, node = self.resolver.resolve(self.cwd, path)
+        if node is None or not node.is_dir or node is self.root:
+            self.show_output(f"Directory '/{canonical}' not found")
+            return
+        self.overlay.remove(node)  # Поддерево удаляется целиком одной операцией
+        if self.cwd == canonical or self.cwd.startswith(canonical + '/'):  # Текущая директория была внутри удалённой
+            self.cwd = posixpath.dirname(canonical) or '/'
+        self.cwd_node = self.lookup('.')  # Каталог мог быть скопирован слоем
+        self.show_output(f"Removed directory /{canonical}")
+
+    def sync(self, path=None):
+        """Сохранение виртуальной файловой системы с изменениями в ZIP-архив (по умолчанию - исходный)."""
+        target = path or self.zip_path
         try:
-            if os.path.isdir(full_path):
-                shutil.rmtree(full_path)
-                self.show_output(f"Removed directory {full_path}")
-            else:
-                self.show_output(f"Directory '{full_path}' not found")
-        except FileNotFoundError:
-            self.show_output(f"Directory '{full_path}' not found")
-        except Exception as e:
-            self.show_output(f"Error removing directory '{full_path}': {e}")
+            count = self.overlay.save(target)
+        except (OSError, zipfile.LargeZipFile) as e:
+            self.show_output(f"Error saving virtual filesystem to '{target}': {e}")
+            return
+        if os.path.abspath(target) == os.path.abspath(self.zip_path):  # Архив заменён: изменения стали его частью
+            self.load_virtual_fs()  # Старое отображение остаётся у других сессий, если архив общий
+            self.cwd_node = self.lookup('.') or self.root
+            self.cwd = self.cwd_node.path or '/'
+        self.show_output(f"Saved {count} entries to {target}")
 
     def show_history(self):
         self.show_output("\n".join(self.history))
 
     def exit_shell(self):
         self.show_output("Exiting shell...")
-        exit()
+        exit()  # close() вызывает владелец эмулятора, когда команда exit уже учтена в статистике
+
+    def close(self):
+        """Закрытие файлов, в которые вытесняются история и вывод, и запись статистики."""
+        self.history.close()
+        self.output.close()
+        if self.stats is not None and self.stats_dump:
+            self.stats.dump(self.stats_dump)
+
+    def show_stats(self):
+        if self.stats is None:
+            self.show_output("Statistics are disabled (set [stats] enabled = true or run with --stats)")
+        else:
+            self.show_output(self.stats.format())
 
     def show_output(self, output):
         self.output.append(output)
-        if hasattr(self, 'output_area'):
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, output + "\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)  # Прокрутка к последнему выводу
+        if self.stream is not None:
+            self.stream.write(output + "\n")
+        elif hasattr(self, 'output_area'):
+            if not self.pending_output:  # Первый вывод в этом кадре: обновление виджета откладывается
+                self.output_area.after(OUTPUT_FRAME_MS, self.flush_output)
+            self.pending_output.append(output)
+
+    def flush_output(self):
+        """Вывод накопленного за кадр текста в виджет одной вставкой."""
+        if not self.pending_output:
+            return
+        start = time.perf_counter()
+        text = "\n".join(self.pending_output) + "\n"
+        self.pending_output = []
+        self.output_area.configure(state='normal')
+        self.output_area.insert('end', text)
+        self.output_area.configure(state='disabled')
+        self.output_area.see('end')  # Прокрутка к последнему выводу
+        if self.stats is not None:
+            self.stats.phase('render', time.perf_counter() - start)
 
     def get_output(self):
         return "\n".join(self.output)
 
     def clear_output(self):
-        self.output = []
+        self.output.clear()
 
     def execute_gui_command(self):
         command = self.input_area.get()
-        self.input_area.delete(0, tk.END)
+        self.input_area.delete(0, 'end')
         if command.strip().lower() == "exit":
             self.exit_shell()
         else:
             self.execute_command(command)
 
 
-def main():
+@command('ls')
+def _ls(shell, args):
+    shell.ls()
+
+
+@command('cd')
+def _cd(shell, args):
+    shell.cd(args[0] if args else '.')
+
+
+@command('exit')
+def _exit(shell, args):
+    shell.exit_shell()
+
+
+@command('rm')
+def _rm(shell, args):
+    if args:
+        shell.rm(args[0])
+    else:
+        shell.show_output("Usage: rm <file>")
+
+
+@command('rmdir')
+def _rmdir(shell, args):
+    if args:
+        shell.rmdir(args[0])
+    else:
+        shell.show_output("Usage: rmdir <directory>")
+
+
+@command('history')
+def _history(shell, args):
+    shell.show_history()
+
+
+@command('stats')
+def _stats(shell, args):
+    shell.show_stats()
+
+
+@command('sync', 'save')
+def _sync(shell, args):
+    shell.sync(args[0] if args else None)
+
+
+def run_headless(config_path, script=None, stream=None):
+    """Пакетный режим без GUI: стартовый скрипт, затем команды из script (файл или '-' для stdin)."""
+    stream = stream or sys.stdout
+    shell = ShellEmulator(config_path, stream)
+    try:
+        shell.initialize()
+        if script == '-':
+            shell.run_script(sys.stdin)
+        elif script:
+            with open(script, 'r', encoding='utf-8') as f:
+                shell.run_script(f)
+    except SystemExit:  # Команда exit
+        pass
+    finally:
+        shell.close()
+        stream.flush()
+    return shell
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shell emulator over a ZIP virtual filesystem.")
+    parser.add_argument("--config", default="config.toml", help="Path to the TOML configuration file")
+    parser.add_argument("--headless", action="store_true", help="Run without the GUI and print output to stdout")
+    parser.add_argument("--script", help="Commands to run in headless mode after the startup script ('-' for stdin)")
+    parser.add_argument("--stats", metavar="JSON", help="Collect command statistics and write them to JSON on exit")
+    args = parser.parse_args(argv)
+
+    config = read_config(args.config)
+    if args.stats:
+        config.setdefault('stats', {}).update(enabled=True, dump=args.stats)
+    if args.headless or args.script:
+        run_headless(config, args.script)
+        return
+    if tk is None:
+        parser.error("tkinter is not available, use --headless")
+
     # Создание главного окна
     root = tk.Tk()
     root.title("Shell Emulator")
 
-    shell = ShellEmulator('config.toml')  # Запускаем эмулятор с заданным конфигурационным файлом
+    shell = ShellEmulator(config)  # Запускаем эмулятор с заданным конфигурационным файлом
 
     # Настройка области вывода
     shell.output_area = scrolledtext.ScrolledText(root, wrap=tk.WORD, state='disabled', height=20, width=50)
@@ -171,7 +375,10 @@ def main():
 
     shell.initialize()  # Запуск стартового скрипта после создания GUI
 
-    root.mainloop()  # Запуск GUI
+    try:
+        root.mainloop()  # Запуск GUI
+    finally:  # Команда exit завершает цикл через SystemExit
+        shell.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+
+from shell_emulator import ShellEmulator, read_config
+from vfs import MappedZip
+
+
+class ShellServer:
+    """Сервер сессий эмулятора оболочки в одном процессе.
+
+    Конфигурация читается и архив отображается в память один раз; у каждой сессии свой
+    ShellEmulator (текущая директория, история, слой изменений) поверх общего дерева архива.
+    Протокол - JSON по одной строке: запрос {"session": id, "command": "ls"}, ответ
+    {"session": id, "output": "...", "closed": false}. Сессия создаётся первым запросом с новым id
+    и закрывается командой exit или разрывом соединения.
+    """
+
+    def __init__(self, config_path, startup=True):
+        self.config = read_config(config_path)
+        self.archive = MappedZip(self.config['filesystem']['path'])
+        self.startup = startup  # Выполнять стартовый скрипт в каждой новой сессии
+        self.connections = 0  # Номер последнего соединения (для файлов статистики сессий)
+
+    def execute(self, sessions, session, command, connection=0):
+        """Выполнение команды в сессии session соединения.
+
+        Возвращает (вывод, закрыта ли сессия, текст ошибки или None); исключение команды
+        не затрагивает другие сессии соединения.
+        """
+        shell = sessions.get(session)
+        closed = False
+        error = None
+        try:
+            if shell is None:
+                shell = sessions[session] = ShellEmulator(self.config, io.StringIO(), self.archive)
+                if shell.stats_dump:  # Своя статистика у каждой сессии: stats.json -> stats.1-2.json
+                    base, extension = os.path.splitext(shell.stats_dump)
+                    key = re.sub(r'[^\w.-]', '_', f"{connection}-{session}")
+                    shell.stats_dump = f"{base}.{key}{extension}"
+                if self.startup:
+                    shell.initialize()
+            archive = shell.archive
+            shell.execute_command(command)
+            if shell.archive is not archive:  # sync заменил архив: новые сессии открывают новый
+                self.archive = MappedZip(self.config['filesystem']['path'])
+        except SystemExit:  # Команда exit
+            closed = True
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if shell is None:  # Сессию не удалось создать
+                return "", False, error
+        output = shell.stream.getvalue()
+        shell.stream.seek(0)
+        shell.stream.truncate()
+        if closed:
+            shell.close()
+            del sessions[session]
+        return output, closed, error
+
+    async def handle(self, reader, writer):
+        """Обслуживание одного соединения (сокета или stdin/stdout) с любым числом сессий."""
+        sessions = {}
+        self.connections += 1
+        connection = self.connections
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    session, command = request.get('session', 0), str(request['command'])
+                    hash(session)  # Идентификатор сессии - ключ словаря
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    response = {"error": "Invalid request, expected {\"session\": id, \"command\": \"...\"}"}
+                else:
+                    output, closed, error = self.execute(sessions, session, command, connection)
+                    response = {"session": session, "output": output, "closed": closed}
+                    if error is not None:
+                        response["error"] = error
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+                await writer.drain()
+        finally:
+            for shell in sessions.values():
+                shell.close()
+            writer.close()
+
+    async def serve_unix(self, socket_path):
+        server = await asyncio.start_unix_server(self.handle, socket_path)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        await self.handle(_StdinReader(), _StdoutWriter())
+
+
+class _StdinReader:
+    """Чтение строк stdin в отдельном потоке: работает и для каналов, и для обычных файлов."""
+
+    async def readline(self):
+        return await asyncio.get_running_loop().run_in_executor(None, sys.stdin.buffer.readline)
+
+
+class _StdoutWriter:
+    def write(self, data):
+        sys.stdout.buffer.write(data)
+
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+    def close(self):
+        sys.stdout.buffer.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve many shell emulator sessions over one shared archive.")
+    parser.add_argument("--config", default="config.toml", help="Path to the TOML configuration file")
+    parser.add_argument("--socket", help="Unix socket path; without it requests are read from stdin")
+    parser.add_argument("--no-startup", action="store_true", help="Do not run the startup script in new sessions")
+    args = parser.parse_args(argv)
+
+    server = ShellServer(args.config, startup=not args.no_startup)
+    try:
+        asyncio.run(server.serve_unix(args.socket) if args.socket else server.serve_stdio())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,14 @@
-from shell_emulator import ShellEmulator
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+import toml
+from shell_emulator import COMMANDS, ShellEmulator, read_config, ring_buffer, run_headless
+from shell_server import ShellServer
+from vfs import MappedZip, Overlay, find, iter_lines, normalize
 
 def test_shell_emulator():
     emulator = ShellEmulator('config.toml')
@@ -34,5 +44,264 @@ def test_shell_emulator():
     test_passed += 1 
     print(f"\nAll {test_passed}/{total_tests} tests passed successfully!")
 
+def test_virtual_fs_tree():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vfs.zip')
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('a/b/file.txt', 'hello')  # Каталоги a и a/b без отдельных записей
+            zip_file.writestr('a/empty/', '')
+            zip_file.writestr('top.txt', '12345678')
+            zip_file.writestr('x/top.txt', 'other')
+        archive = MappedZip(path)
+        node = archive.find_file('/a/b/file.txt')  # Без раскрытия корня
+        assert archive.root.pending is not None and node.size == 5 and b''.join(archive.iter_content(node)) == b'hello'
+        assert archive.find_file('top.txt').size == 8 and archive.find_file('b/file.txt') is None
+        assert archive.find_file('a/empty') is None and archive.find_file('missing') is None
+
+        root = archive.root
+        assert root.listing() == ['a/', 'top.txt', 'x/']
+        assert find(root, 'a').listing() == ['b/', 'empty/']
+        node = find(root, 'a/b/file.txt')
+        assert node.size == 5 and not node.is_dir and node.path == 'a/b/file.txt'
+        assert find(root, 'a/missing') is None and find(root, 'top.txt/x') is None
+        archive.close()
+    print("Virtual FS tree test passed!")
+
+def test_mapped_zip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vfs.zip')
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('a/b/file.txt', 'hello')
+            zip_file.writestr('a/empty/', '')
+            zip_file.writestr('script.sh', 'ls\n' * 1000, compress_type=zipfile.ZIP_DEFLATED)
+        archive = MappedZip(path)
+        assert archive.root.pending is not None  # Центральный каталог ещё не разобран
+
+        assert archive.root.listing() == ['a/', 'script.sh']
+        a = find(archive.root, 'a')
+        assert a.pending is not None and a.listing() == ['b/', 'empty/']
+        assert a.pending is None and a.children['b'].pending is not None  # a/b ещё не раскрыт
+        node = find(archive.root, 'a/b/file.txt')
+        assert b''.join(archive.iter_content(node)) == b'hello' and node.size == 5
+        lines = list(iter_lines(archive.iter_content(find(archive.root, 'script.sh'), chunk_size=7)))
+        assert lines == [b'ls\n'] * 1000
+        archive.close()
+    print("Mapped zip test passed!")
+
+def test_overlay_save():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'vfs.zip')
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('a/b/file.txt', 'hello')
+            zip_file.writestr('a/b/c/deep.txt', 'deep')
+            zip_file.writestr('keep.txt', 'keep' * 100, compress_type=zipfile.ZIP_DEFLATED)
+            zip_file.writestr('gone.txt', 'x')
+        archive = MappedZip(path)
+        overlay = Overlay(archive)
+        overlay.remove(find(archive.root, 'a/b'))  # Подкаталог a/b не раскрывается
+        overlay.remove(find(archive.root, 'gone.txt'))
+        overlay.write_file(find(archive.root, 'a'), 'new.txt', b'new')
+        overlay.mkdir(archive.root, 'empty')
+        assert overlay.root.listing() == ['a/', 'empty/', 'keep.txt'] and overlay.version == 4
+        assert archive.root.listing() == ['a/', 'gone.txt', 'keep.txt']  # Дерево архива не изменилось
+
+        saved = os.path.join(tmp, 'saved.zip')
+        assert overlay.save(saved) == 3
+        with zipfile.ZipFile(saved) as zip_file:
+            assert zip_file.testzip() is None
+            assert sorted(zip_file.namelist()) == ['a/new.txt', 'empty/', 'keep.txt']
+            assert zip_file.read('keep.txt') == b'keep' * 100 and zip_file.read('a/new.txt') == b'new'
+        archive.close()
+    print("Overlay save test passed!")
+
+def test_headless():
+    stream = io.StringIO()
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, 'script.txt')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write("cd some_directory\n\nls\nexit\nls\n")
+        shell = run_headless('config.toml', script, stream)
+    assert stream.getvalue() == shell.get_output() + "\n"
+    assert list(shell.history)[-2:] == ['ls', 'exit']  # Команды после exit не выполняются
+    assert "Changed directory to some_directory" in shell.output
+    print("Headless mode test passed!")
+
+def test_command_registry_and_buffers():
+    with tempfile.TemporaryDirectory() as tmp:
+        spill = os.path.join(tmp, 'history.log')
+        history = ring_buffer(3, spill)
+        for i in range(5):
+            history.append(f"cmd {i}")
+        history.close()
+        assert list(history) == ['cmd 2', 'cmd 3', 'cmd 4']
+        with open(spill, encoding='utf-8') as f:
+            assert f.read() == "cmd 0\ncmd 1\n"
+
+    shell = ShellEmulator('config.toml', io.StringIO())
+    shell.register_command('echo', lambda shell, args: shell.show_output(" ".join(args)))
+    shell.run_script(["echo hello world", "   ", "unknown"])
+    assert list(shell.output)[-2:] == ["hello world", "Command 'unknown' not found"]
+    assert list(shell.history) == ["echo hello world", "unknown"]
+    print("Command registry and buffers test passed!")
+
+def test_shell_server():
+    server = ShellServer('config.toml', startup=False)
+
+    async def session_dialog(socket_path):
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        responses = []
+        for session, command in [(1, 'cd some_directory'), (2, 'ls'), (1, 'rm some_file.txt'), (1, 'ls'),
+                                 (2, 'cd some_directory'), (2, 'ls'), (1, 'exit')]:
+            writer.write(json.dumps({"session": session, "command": command}).encode() + b"\n")
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        return responses
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = os.path.join(tmp, 'shell.sock')
+            listener = await asyncio.start_unix_server(server.handle, socket_path)
+            async with listener:
+                return await session_dialog(socket_path)
+
+    responses = asyncio.run(run())
+    assert responses[1]["output"] == "another_directory/\nsome_directory/\nstartup_script.txt\n"  # Своя cwd
+    assert "some_file.txt" not in responses[3]["output"]
+    assert "some_file.txt" in responses[5]["output"]  # Удаление в сессии 1 не видно сессии 2
+    assert responses[6] == {"session": 1, "output": "Exiting shell...\n", "closed": True}
+    assert server.archive.root.children['some_directory'].children.get('some_file.txt') is not None
+    print("Shell server test passed!")
+
+def test_shell_server_errors_and_sync():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = read_config('config.toml')
+        config['filesystem']['path'] = os.path.join(tmp, 'vfs.zip')
+        config['stats'] = {'enabled': True, 'dump': os.path.join(tmp, 'stats.json')}
+        shutil.copy('virtual_fs.zip', config['filesystem']['path'])
+        config_path = os.path.join(tmp, 'config.toml')
+        with open(config_path, 'w') as f:
+            toml.dump(config, f)
+        server = ShellServer(config_path, startup=False)
+
+        def fail(shell, args):
+            raise RuntimeError("plugin failed")
+
+        class Reader:
+            def __init__(self, requests):
+                self.lines = [json.dumps(request).encode() + b"\n" for request in requests] + [b""]
+
+            async def readline(self):
+                return self.lines.pop(0)
+
+        class Writer:
+            def __init__(self):
+                self.data = b""
+
+            def write(self, data):
+                self.data += data
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        writer = Writer()
+        requests = [{"session": 1, "command": "cd some_directory"}, {"session": [1], "command": "ls"},
+                    {"session": 1, "command": "fail"}, {"session": 1, "command": "rm some_file.txt"},
+                    {"session": 1, "command": "sync"}, {"session": 2, "command": "ls some_directory"},
+                    {"session": 2, "command": "cd some_directory"}, {"session": 2, "command": "ls"},
+                    {"session": 1, "command": "exit"}]
+        COMMANDS['fail'] = fail
+        try:
+            asyncio.run(server.handle(Reader(requests), writer))
+        finally:
+            del COMMANDS['fail']
+        responses = [json.loads(line) for line in writer.data.splitlines()]
+        assert "session" not in responses[1] and responses[1]["error"].startswith("Invalid request")
+        assert responses[2]["error"] == "RuntimeError: plugin failed" and not responses[2]["closed"]
+        assert responses[3]["output"].startswith("Removed") and "error" not in responses[3]  # Сессия 1 жива
+        assert "some_file.txt" not in responses[7]["output"]  # Новая сессия видит сохранённый архив
+        for session, commands in ((1, {"cd", "exit", "fail", "rm", "sync"}), (2, {"cd", "ls"})):
+            with open(os.path.join(tmp, f'stats.1-{session}.json'), encoding='utf-8') as f:
+                assert set(json.load(f)["commands"]) == commands  # Отдельный файл у каждой сессии
+        server.archive.close()
+    print("Shell server errors and sync test passed!")
+
+def test_shell_server_concurrent_sync():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = read_config('config.toml')
+        config['filesystem']['path'] = os.path.join(tmp, 'vfs.zip')
+        config.pop('stats', None)
+        shutil.copy('virtual_fs.zip', config['filesystem']['path'])
+        config_path = os.path.join(tmp, 'config.toml')
+        with open(config_path, 'w') as f:
+            toml.dump(config, f)
+        server = ShellServer(config_path, startup=False)
+        sessions = {}
+        for session, command in ((1, "ls"), (2, "ls"), (1, "rm some_directory/some_file.txt"), (1, "sync"),
+                                 (2, "rm another_directory/test_file2.txt")):
+            server.execute(sessions, session, command)
+        output, _, error = server.execute(sessions, 2, "sync")  # Слой сессии 2 основан на старом архиве
+        assert error is None and output.startswith("Error saving") and "replaced" in output
+        with zipfile.ZipFile(config['filesystem']['path']) as archive:
+            names = archive.namelist()
+        assert 'some_directory/some_file.txt' not in names and 'another_directory/test_file2.txt' in names
+        copy = os.path.join(tmp, 'copy.zip')
+        output, _, _ = server.execute(sessions, 2, f"sync {copy}")  # В другой файл сохранить можно
+        assert output.startswith("Saved") and os.path.exists(copy)
+        for shell in sessions.values():
+            shell.close()
+        server.archive.close()
+    print("Shell server concurrent sync test passed!")
+
+def test_path_resolver():
+    assert normalize('a/b', '../c/./d') == 'a/c/d'
+    assert normalize('a', '/x//y/') == 'x/y' and normalize('/', '../..') == ''
+
+    emulator = ShellEmulator('config.toml', io.StringIO())
+    emulator.run_script(['cd some_directory/some_directory', 'cd ../invalid_directory/.', 'cd ..', 'cd /another_directory'])
+    assert list(emulator.output)[-3:] == ["Changed directory to some_directory/some_directory",
+                                          "Changed directory to some_directory/invalid_directory",
+                                          "Changed directory to another_directory"]
+    resolver = emulator.resolver
+    assert resolver.resolve('/', 'some_directory/some_file.txt')[1] is not None
+    hits = resolver.cached.cache_info().hits
+    resolver.resolve('/', 'some_directory/some_file.txt')
+    assert resolver.cached.cache_info().hits == hits + 1
+    emulator.rm('/some_directory/some_file.txt')  # Изменение слоя сбрасывает кэш
+    assert resolver.resolve('/', 'some_directory/some_file.txt') == ('some_directory/some_file.txt', None)
+    print("Path resolver test passed!")
+
+def test_instrumentation():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, 'stats.json')
+        config = read_config('config.toml')
+        config['stats'] = {'enabled': True, 'allocations': True, 'dump': dump}
+        shell = run_headless(config, None, io.StringIO())
+        shell.run_script(['ls', 'ls', 'cd some_directory', 'stats'])
+        assert shell.output[-1].startswith("command cd: 2 calls") and "peak alloc" in shell.output[-1]
+        try:
+            shell.run_script(['exit'])
+        except SystemExit:
+            pass
+        shell.close()
+        with open(dump, encoding='utf-8') as f:
+            report = json.load(f)
+    assert report["commands"]["ls"]["count"] == 2 + 2  # Два вызова и два из стартового скрипта
+    assert sum(report["commands"]["ls"]["histogram_us"].values()) == 4
+    assert report["commands"]["exit"]["count"] == 1  # Записана после завершения команды exit
+    assert report["phases"]["vfs_load"]["count"] == 1 and report["phases"]["vfs_expand"]["count"] >= 1
+    print("Instrumentation test passed!")
+
 if __name__ == "__main__":
     test_shell_emulator()
+    test_virtual_fs_tree()
+    test_mapped_zip()
+    test_overlay_save()
+    test_headless()
+    test_command_registry_and_buffers()
+    test_shell_server()
+    test_shell_server_errors_and_sync()
+    test_path_resolver()
+    test_instrumentation()
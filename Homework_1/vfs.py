@@ -0,0 +1,483 @@
+import mmap
+import os
+import struct
+import time
+import zipfile
+import zlib
+from array import array
+from functools import lru_cache
+
+CHUNK_SIZE = 64 * 1024  # Размер блока при потоковом чтении содержимого файлов
+RESOLVE_CACHE_SIZE = 1024  # Число запоминаемых разрешений путей по умолчанию
+
+_EOCD = struct.Struct("<4s4H2LH")  # Конец центрального каталога
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_RECORD = struct.Struct("<4s6H3L5H2L")  # Запись центрального каталога (46 байт)
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")  # Локальный заголовок файла (30 байт)
+_EOCD_SIGNATURE = b"PK\x05\x06"
+_CENTRAL_SIGNATURE = b"PK\x01\x02"
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+_ALL_RECORDS = object()  # Отметка корня, центральный каталог которого ещё не просматривался
+
+
+class Node:
+    """Узел дерева виртуальной файловой системы: каталог (children - словарь) или файл (children - None).
+
+    Каталог лениво отображаемого архива хранит в pending смещения записей центрального каталога,
+    лежащих внутри него; дочерние узлы создаются при первом обращении к children.
+    """
+    __slots__ = ("name", "parent", "_children", "size", "offset", "record", "pending", "archive")
+
+    def __init__(self, name, parent=None, directory=True, size=0, offset=None):
+        self.name = name
+        self.parent = parent
+        self._children = {} if directory else None
+        self.size = size  # Размер файла из ZipInfo.file_size
+        self.offset = offset  # Смещение локального заголовка в архиве из ZipInfo.header_offset
+        self.record = None  # Смещение записи центрального каталога (только для MappedZip)
+        self.pending = None
+        self.archive = None
+
+    @property
+    def is_dir(self):
+        return self._children is not None
+
+    @property
+    def children(self):
+        if self.pending is not None:
+            self.archive.expand(self)
+        return self._children
+
+    @property
+    def path(self):
+        """Путь от корня без ведущего '/' (у корня - пустая строка)."""
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/".join(reversed(parts))
+
+    def mkdir(self, name):
+        """Дочерний каталог name; создаётся, если его ещё нет."""
+        child = self.children.get(name)
+        if child is None or not child.is_dir:
+            child = self.children[name] = Node(name, self)
+        return child
+
+    def listing(self):
+        """Отсортированные имена содержимого каталога, у подкаталогов в конце '/'."""
+        return sorted(name + "/" if child.is_dir else name for name, child in self.children.items())
+
+
+def find(node, path):
+    """Узел по пути относительно node (сегменты через '/'), None если пути нет."""
+    for part in path.split("/"):
+        if not part:
+            continue
+        if not node.is_dir:
+            return None
+        node = node.children.get(part)
+        if node is None:
+            return None
+    return node
+
+
+def normalize(cwd, path):
+    """Канонический путь (без ведущего '/', у корня - пустая строка) для path относительно cwd.
+
+    Поддерживаются абсолютные пути, '.', '..' (выше корня не поднимается) и повторные '/'.
+    """
+    parts = [] if path.startswith("/") else [part for part in cwd.split("/") if part]
+    for part in path.split("/"):
+        if part == "..":
+            if parts:
+                parts.pop()
+        elif part and part != ".":
+            parts.append(part)
+    return "/".join(parts)
+
+
+class PathResolver:
+    """Разрешение путей в узлы слоя overlay с LRU-кэшем по ключу (cwd, path).
+
+    Кэш сбрасывается, когда меняется версия слоя (удаление или создание узлов).
+    """
+
+    def __init__(self, overlay, capacity=RESOLVE_CACHE_SIZE):
+        self.overlay = overlay
+        self.version = overlay.version
+        self.cached = lru_cache(maxsize=capacity)(self._resolve)
+
+    def resolve(self, cwd, path):
+        """(канонический путь, узел или None) для path относительно каталога cwd."""
+        if self.overlay.version != self.version:
+            self.cached.cache_clear()
+            self.version = self.overlay.version
+        return self.cached(cwd, path)
+
+    def _resolve(self, cwd, path):
+        canonical = normalize(cwd, path)
+        return canonical, find(self.overlay.root, canonical)
+
+
+def iter_lines(chunks):
+    """Разбиение потока блоков байт на строки (с завершающим b'\\n', как у файлового объекта)."""
+    tail = b""
+    for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if tail:
+        yield tail
+
+
+def _stamp(stat):
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class MappedZip:
+    """ZIP-архив, отображённый в память через mmap.
+
+    При открытии читается только конец центрального каталога. Записи каталога разбираются
+    при первом обращении к содержимому каждого каталога дерева (см. Node.children),
+    а содержимое файлов читается блоками без распаковки файла целиком.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Пустой файл
+                raise zipfile.BadZipFile(f"File is not a zip file: {path}") from None
+            self.stamp = _stamp(os.fstat(f.fileno()))
+        self.directory_offset, self.directory_size = self._locate_directory()
+        self.root = Node("")
+        self.root.archive = self
+        self.root.pending = _ALL_RECORDS
+
+    def close(self):
+        self.map.close()
+
+    def replaced(self):
+        """Заменён ли файл path после открытия (например, sync из другой сессии)."""
+        try:
+            return _stamp(os.stat(self.path)) != self.stamp
+        except FileNotFoundError:
+            return False
+
+    def _locate_directory(self):
+        """Смещение и размер центрального каталога по записи его конца (с поддержкой ZIP64)."""
+        eocd = self.map.rfind(_EOCD_SIGNATURE, max(0, len(self.map) - _EOCD.size - 0xFFFF))
+        if eocd < 0:
+            raise zipfile.BadZipFile(f"File is not a zip file: {self.path}")
+        _, _, _, _, entries, size, offset, _ = _EOCD.unpack_from(self.map, eocd)
+        if entries == 0xFFFF or size == 0xFFFFFFFF or offset == 0xFFFFFFFF:
+            locator = eocd - _ZIP64_LOCATOR.size
+            signature, _, zip64_eocd, _ = _ZIP64_LOCATOR.unpack_from(self.map, locator)
+            if signature != b"PK\x06\x07":
+                raise zipfile.BadZipFile(f"Corrupt ZIP64 archive: {self.path}")
+            fields = _ZIP64_EOCD.unpack_from(self.map, zip64_eocd)
+            size, offset = fields[-2], fields[-1]
+        return offset, size
+
+    def _records(self):
+        """Смещения всех записей центрального каталога."""
+        offsets = array("Q")
+        position = self.directory_offset
+        end = self.directory_offset + self.directory_size
+        while position < end:
+            offsets.append(position)
+            name_length, extra_length, comment_length = struct.unpack_from("<3H", self.map, position + 28)
+            position += _CENTRAL_RECORD.size + name_length + extra_length + comment_length
+        return offsets
+
+    def _name(self, record):
+        flags = struct.unpack_from("<H", self.map, record + 8)[0]
+        name_length = struct.unpack_from("<H", self.map, record + 28)[0]
+        raw = self.map[record + _CENTRAL_RECORD.size:record + _CENTRAL_RECORD.size + name_length]
+        return raw.decode("utf-8" if flags & 0x800 else "cp437")
+
+    def _entry(self, record):
+        """(флаги, метод сжатия, сжатый размер, размер, смещение локального заголовка) записи каталога."""
+        fields = _CENTRAL_RECORD.unpack_from(self.map, record)
+        flags, method = fields[3], fields[4]
+        compressed, size = fields[8], fields[9]
+        name_length, extra_length = fields[10], fields[11]
+        offset = fields[-1]
+        if 0xFFFFFFFF in (compressed, size, offset):  # Настоящие значения в дополнительном поле ZIP64
+            extra = record + _CENTRAL_RECORD.size + name_length
+            position, end = extra, extra + extra_length
+            while position + 4 <= end:
+                header_id, data_length = struct.unpack_from("<2H", self.map, position)
+                if header_id == 0x0001:
+                    values = iter(struct.unpack_from(f"<{data_length // 8}Q", self.map, position + 4))
+                    if size == 0xFFFFFFFF:
+                        size = next(values)
+                    if compressed == 0xFFFFFFFF:
+                        compressed = next(values)
+                    if offset == 0xFFFFFFFF:
+                        offset = next(values)
+                    break
+                position += 4 + data_length
+        return flags, method, compressed, size, offset
+
+    def expand(self, node):
+        """Разбор записей, лежащих внутри каталога node, в его дочерние узлы (один раз)."""
+        pending = self._records() if node.pending is _ALL_RECORDS else node.pending
+        node.pending = None
+        children = node._children
+        prefix = node.path
+        prefix_length = len(prefix) + 1 if prefix else 0
+        for record in pending:
+            relative = self._name(record)[prefix_length:]
+            name, separator, rest = relative.partition("/")
+            if not name:
+                continue
+            child = children.get(name)
+            if separator:  # Подкаталог (явная запись или путь к файлу внутри него)
+                if child is None or not child.is_dir:
+                    child = children[name] = Node(name, node)
+                    child.archive = self
+                    child.pending = array("Q")
+                if rest.strip("/") and child.pending is not None:
+                    child.pending.append(record)
+            else:
+                _, _, _, size, offset = self._entry(record)
+                child = children[name] = Node(name, node, False, size, offset)
+                child.record = record
+
+    def find_file(self, path):
+        """Узел файла path без разбора каталогов (None, если файла нет).
+
+        Имя ищется в центральном каталоге поиском байтов (mmap.find), записи разбираются только
+        для совпадений, поэтому стоимость не растёт с числом записей так, как раскрытие корня.
+        Узел не связан с деревом (parent - None) и годится для чтения через iter_content.
+        """
+        name = path.strip("/")
+        encoded = name.encode("utf-8")
+        if not encoded:
+            return None
+        found = None
+        start, end = self.directory_offset, self.directory_offset + self.directory_size
+        position = self.map.find(encoded, start + _CENTRAL_RECORD.size, end)
+        while position >= 0:
+            record = position - _CENTRAL_RECORD.size
+            if (self.map[record:record + 4] == _CENTRAL_SIGNATURE
+                    and struct.unpack_from("<H", self.map, record + 28)[0] == len(encoded)
+                    and self._name(record) == name):
+                found = record  # При повторяющихся именах действует последняя запись, как в expand
+            position = self.map.find(encoded, position + 1, end)
+        if found is None:
+            return None
+        _, _, _, size, offset = self._entry(found)
+        node = Node(name.rpartition("/")[2], None, False, size, offset)
+        node.record = found
+        return node
+
+    def iter_content(self, node, chunk_size=CHUNK_SIZE):
+        """Содержимое файла блоками по chunk_size байт."""
+        flags, method, compressed, _, offset = self._entry(node.record)
+        if flags & 0x1:
+            raise NotImplementedError(f"Encrypted file is not supported: {node.path}")
+        name_length, extra_length = struct.unpack_from("<2H", self.map, offset + 26)
+        start = offset + _LOCAL_HEADER.size + name_length + extra_length
+        end = start + compressed
+        if method == zipfile.ZIP_STORED:
+            for position in range(start, end, chunk_size):
+                yield self.map[position:min(position + chunk_size, end)]
+        elif method == zipfile.ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            for position in range(start, end, chunk_size):
+                data = decompressor.decompress(self.map[position:min(position + chunk_size, end)])
+                if data:
+                    yield data
+            data = decompressor.flush()
+            if data:
+                yield data
+        else:  # Прочие методы сжатия читаются через zipfile
+            with zipfile.ZipFile(self.path) as zip_file, zip_file.open(self._name(node.record)) as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    yield data
+
+
+def _dos_time(timestamp):
+    """Время и дата в формате MS-DOS для заголовков ZIP."""
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    return (hour << 11) | (minute << 5) | (second // 2), ((max(year, 1980) - 1980) << 9) | (month << 5) | day
+
+
+class Overlay:
+    """Слой копирования при записи поверх MappedZip.
+
+    Дерево архива не изменяется: перед изменением каталога слой копирует его и всех его предков
+    (копия разделяет с оригиналом дочерние узлы), поэтому несколько слоёв могут работать поверх
+    одного архива. Удаление запоминается как путь-затенение (whiteout) и убирает узел из копии
+    родителя одной операцией независимо от размера поддерева. Новые файлы и каталоги хранятся
+    в памяти. Архив не изменяется до явного вызова save, который записывает итоговое дерево
+    в новый ZIP за один проход.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.root = archive.root  # Корень слоя; заменяется копией при первом изменении
+        self.owned = set()  # Каталоги, скопированные этим слоем
+        self.whiteouts = set()  # Пути удалённых или перекрытых записей архива
+        self.added = {}  # Путь нового узла -> содержимое (None для каталога)
+        self.version = 0  # Увеличивается при каждом изменении дерева
+
+    @property
+    def dirty(self):
+        return bool(self.whiteouts or self.added)
+
+    def _copy(self, node, parent):
+        copy = Node(node.name, parent)
+        copy._children = dict(node.children)
+        self.owned.add(copy)
+        return copy
+
+    def _own(self, path):
+        """Собственная копия каталога path (сегменты через '/') вместе со всеми предками."""
+        if self.root not in self.owned:
+            self.root = self._copy(self.root, None)
+        node = self.root
+        for part in path.split("/"):
+            if not part:
+                continue
+            child = node._children[part]
+            if child not in self.owned:
+                child = node._children[part] = self._copy(child, node)
+            node = child
+        return node
+
+    def remove(self, node):
+        """Удаление файла или каталога вместе со всем содержимым."""
+        path = node.path
+        del self._own(node.parent.path)._children[node.name]
+        self.whiteouts.add(path)
+        if self.added:
+            prefix = path + "/"
+            for added in [added for added in self.added if added == path or added.startswith(prefix)]:
+                del self.added[added]
+        self.version += 1
+
+    def mkdir(self, parent, name):
+        """Создание каталога name в parent (существующий каталог возвращается как есть)."""
+        child = parent.children.get(name)
+        if child is not None and child.is_dir:
+            return child
+        if child is not None:
+            self.remove(child)
+        child = self._own(parent.path).mkdir(name)
+        self.owned.add(child)
+        self.added[child.path] = None
+        self.version += 1
+        return child
+
+    def write_file(self, parent, name, data):
+        """Создание или замена файла name в каталоге parent содержимым data (bytes)."""
+        child = parent.children.get(name)
+        if child is not None:
+            self.remove(child)
+        parent = self._own(parent.path)
+        child = parent._children[name] = Node(name, parent, False, len(data))
+        path = child.path
+        self.whiteouts.add(path)  # Прежняя запись архива с тем же именем не сохраняется
+        self.added[path] = data
+        self.version += 1
+        return child
+
+    def _hidden(self, name):
+        """Затенена ли запись архива name удалением её самой или одного из каталогов-предков."""
+        name = name.rstrip("/")
+        if name in self.whiteouts:
+            return True
+        position = name.find("/")
+        while position >= 0:
+            if name[:position] in self.whiteouts:
+                return True
+            position = name.find("/", position + 1)
+        return False
+
+    def save(self, path, chunk_size=CHUNK_SIZE):
+        """Запись дерева с изменениями в ZIP-архив path за один проход, возвращает число записей.
+
+        Сохраняемые записи копируются из исходного архива без распаковки (локальный заголовок
+        и сжатые данные одним блоком), новые файлы сжимаются deflate. Архив пишется во временный
+        файл и заменяет path только после успешной записи, поэтому path может совпадать с исходным.
+        Исходный архив, заменённый после открытия, не перезаписывается: слой основан на старой версии
+        и затёр бы изменения, сохранённые в новой.
+        """
+        if os.path.abspath(path) == os.path.abspath(self.archive.path) and self.archive.replaced():
+            raise OSError("archive was replaced after this session opened it; save to another path")
+        temporary = path + ".tmp"
+        try:
+            with open(temporary, "wb") as out:
+                count = self._write(out, chunk_size)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        os.replace(temporary, path)
+        return count
+
+    def _write(self, out, chunk_size):
+        archive = self.archive
+        source = archive.map
+        records = archive._records()
+        # Данные записи заканчиваются там, где начинается следующий локальный заголовок
+        starts = sorted({archive._entry(record)[4] for record in records})
+        ends = dict(zip(starts, starts[1:] + [archive.directory_offset]))
+        directory = bytearray()
+        count = 0
+        for record in records:
+            if self._hidden(archive._name(record)):
+                continue
+            offset = archive._entry(record)[4]
+            position = out.tell()
+            if position > 0xFFFFFFFF:
+                raise zipfile.LargeZipFile("Saving ZIP64 archives is not supported")
+            for start in range(offset, ends[offset], chunk_size):
+                out.write(source[start:min(start + chunk_size, ends[offset])])
+            name_length, extra_length, comment_length = struct.unpack_from("<3H", source, record + 28)
+            end = record + _CENTRAL_RECORD.size + name_length + extra_length + comment_length
+            entry = bytearray(source[record:end])
+            struct.pack_into("<L", entry, 42, position)
+            directory += entry
+            count += 1
+        modified = _dos_time(time.time())
+        for name, data in self.added.items():
+            if data is None:  # Каталог
+                name, data, stored = name + "/", b"", b""
+                method, attributes = zipfile.ZIP_STORED, (0o40755 << 16) | 0x10
+            else:
+                compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+                stored = compressor.compress(data) + compressor.flush()
+                method, attributes = zipfile.ZIP_DEFLATED, 0o100644 << 16
+                if len(stored) >= len(data):
+                    method, stored = zipfile.ZIP_STORED, data
+            encoded = name.encode("utf-8")
+            crc = zlib.crc32(data)
+            position = out.tell()
+            if position > 0xFFFFFFFF:
+                raise zipfile.LargeZipFile("Saving ZIP64 archives is not supported")
+            out.write(_LOCAL_HEADER.pack(_LOCAL_SIGNATURE, 20, 0x800, method, *modified, crc,
+                                         len(stored), len(data), len(encoded), 0))
+            out.write(encoded)
+            out.write(stored)
+            directory += _CENTRAL_RECORD.pack(_CENTRAL_SIGNATURE, 0x314, 20, 0x800, method, *modified, crc,
+                                              len(stored), len(data), len(encoded), 0, 0, 0, 0,
+                                              attributes, position)
+            directory += encoded
+            count += 1
+        position = out.tell()
+        if count > 0xFFFF or position > 0xFFFFFFFF:
+            raise zipfile.LargeZipFile("Saving ZIP64 archives is not supported")
+        out.write(directory)
+        out.write(_EOCD.pack(_EOCD_SIGNATURE, 0, 0, count, count, len(directory), position, 0))
+        return count
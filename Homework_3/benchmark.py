@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Нет на Windows: пиковая память не измеряется
+    resource = None
+
+from config_language import array_to_string, convert_xml_file, convert_xml_to_custom_language, is_valid_name
+
+CONVERTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config_language.py")
+
+def build_array(width, depth):
+    """Элемент <array> с width значениями на каждом из depth уровней вложенности (без рекурсии)."""
+    root = ET.Element('array')
+    level = root
+    for _ in range(depth):
+        for i in range(width):
+            ET.SubElement(level, 'value').text = str(i)
+        level = ET.SubElement(level, 'array')
+    return root
+
+def bench(func, number):
+    """Лучшее время одного вызова func из трёх серий по number вызовов, в секундах."""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+def micro_benchmark(width=10, depth=1000, names=10000):
+    array = build_array(width, depth)
+    name_list = [f"NAME_{'X' * (i % 20)}" for i in range(names)] + ["invalidName"] * (names // 10)
+    return {
+        "is_valid_name_ns": bench(lambda: [is_valid_name(name) for name in name_list], 10) / len(name_list) * 1e9,
+        "array_to_string_seconds": bench(lambda: array_to_string(array), 5),
+        "array_values": width * depth,
+        "array_depth": depth,
+    }
+
+def letters(number):
+    """Имя из заглавных букв для номера number (A, B, ..., Z, BA, ...): цифры в именах недопустимы."""
+    name = ""
+    while True:
+        number, digit = divmod(number, 26)
+        name = chr(ord('A') + digit) + name
+        if not number:
+            return name
+
+def generate_config(variables, constants, references, depth, arrays=10, width=10, seed=0):
+    """Синтетический XML-конфиг по частям текста (генератор строк), без построения дерева.
+
+    Половина констант ссылается на случайную константу ниже по файлу (цепочки ссылок вперёд
+    без циклов), references ссылок $(NAME) распределяются по значениям переменных, каждый из
+    arrays массивов имеет depth уровней вложенности по width значений.
+    """
+    rng = random.Random(seed)
+    yield "<config>\n"
+    for i in range(constants):
+        value = str(i)
+        if i + 1 < constants and rng.random() < 0.5:
+            value = f"$(C_{letters(rng.randrange(i + 1, constants))}) + {value}"
+        yield f'<constant name="C_{letters(i)}">{value}</constant>\n'
+    for i in range(variables):
+        count = references // variables + (i < references % variables)
+        refs = [f"$(C_{letters(rng.randrange(constants))})" if constants else "$(UNKNOWN)" for _ in range(count)]
+        yield f'<variable name="V_{letters(i)}">{" + ".join(refs) or i}</variable>\n'
+    level = "<array>" + "".join(f"<value>{i}</value>" for i in range(width))
+    for _ in range(arrays):
+        yield level * depth + "<array/>" + "</array>" * depth + "\n"
+    yield "</config>\n"
+
+def write_config(chunks, xml_path):
+    with open(xml_path, "w", encoding="utf-8") as f:
+        f.writelines(chunks)
+
+def _peak_rss_kb(who):
+    """Пиковая память процесса (RUSAGE_SELF) или его завершённых потомков (RUSAGE_CHILDREN), КБ."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS считает в байтах
+
+def _bench_convert(xml_path):
+    start = time.perf_counter()
+    root = ET.parse(xml_path).getroot()
+    parsed = time.perf_counter()
+    result = convert_xml_to_custom_language(root)
+    finish = time.perf_counter()
+    return {"seconds": finish - start, "parse_seconds": parsed - start, "convert_seconds": finish - parsed,
+            "output_bytes": len(result.encode('utf-8'))}
+
+def _bench_stream(xml_path, output_path):
+    start = time.perf_counter()
+    convert_xml_file(xml_path, output_path)
+    return {"seconds": time.perf_counter() - start, "output_bytes": os.path.getsize(output_path)}
+
+def _bench_cli(xml_path, output_path, stream):
+    """Запуск config_language.py как отдельной программы; память - пик дочернего процесса."""
+    command = [sys.executable, CONVERTER] + (["--stream"] if stream else []) + [xml_path, output_path]
+    start = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True)
+    result = {"seconds": time.perf_counter() - start, "returncode": completed.returncode,
+              "child_peak_rss_kb": _peak_rss_kb(resource.RUSAGE_CHILDREN if resource else None)}
+    if completed.returncode or completed.stdout:
+        result["output"] = completed.stdout.strip()
+    return result
+
+def _in_worker(func, args):
+    result = func(*args)
+    result["peak_rss_kb"] = _peak_rss_kb(resource.RUSAGE_SELF if resource else None)
+    return result
+
+def measure(func, *args):
+    """func(*args) в новом процессе: пик памяти не включает генерацию XML и предыдущие замеры."""
+    with ProcessPoolExecutor(1) as pool:
+        return pool.submit(_in_worker, func, args).result()
+
+def _commit():
+    try:  # Хеш коммита, чтобы сравнивать результаты между версиями конвертера
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(CONVERTER)).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_benchmark(variables, constants, references, depth, arrays=10, width=10, seed=0):
+    """Полный прогон: генерация XML, преобразование в памяти, потоковое и через командную строку."""
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"variables": variables, "constants": constants, "references": references,
+                   "depth": depth, "arrays": arrays, "width": width, "seed": seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        xml_path = os.path.join(tmp, "config.xml")
+        output_path = os.path.join(tmp, "config.txt")
+        write_config(generate_config(variables, constants, references, depth, arrays, width, seed), xml_path)
+        report["params"]["input_bytes"] = os.path.getsize(xml_path)
+        report["results"]["convert"] = measure(_bench_convert, xml_path)
+        report["results"]["convert_stream"] = measure(_bench_stream, xml_path, output_path)
+        report["results"]["cli"] = measure(_bench_cli, xml_path, output_path, False)
+        report["results"]["cli_stream"] = measure(_bench_cli, xml_path, output_path, True)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк преобразования синтетических XML-конфигов.")
+    parser.add_argument("--variables", type=int, default=10000, help="Число переменных")
+    parser.add_argument("--constants", type=int, default=1000, help="Число констант")
+    parser.add_argument("--references", type=int, default=20000, help="Число ссылок $(NAME) в значениях переменных")
+    parser.add_argument("--arrays", type=int, default=10, help="Число массивов")
+    parser.add_argument("--width", type=int, default=10, help="Число значений на каждом уровне массива")
+    parser.add_argument("--depth", type=int, default=1000, help="Глубина вложенности массива")
+    parser.add_argument("--seed", type=int, default=0, help="Начальное значение генератора")
+    parser.add_argument("--output", default="benchmark.json", help="Файл результатов в формате JSON")
+    parser.add_argument("--micro", action="store_true",
+                        help="Только микро-бенчмарк проверки имён и сериализации массивов")
+    parser.add_argument("--names", type=int, default=10000, help="Число проверяемых имён (--micro)")
+    args = parser.parse_args()
+
+    if args.micro:
+        result = micro_benchmark(args.width, args.depth, args.names)
+        print(f"is_valid_name: {result['is_valid_name_ns']:.0f} нс на имя")
+        print(f"array_to_string: {result['array_to_string_seconds'] * 1e3:.2f} мс на массив "
+              f"из {result['array_values']} значений глубины {result['array_depth']}")
+        sys.exit(0)
+
+    report = run_benchmark(args.variables, args.constants, args.references, args.depth,
+                           args.arrays, args.width, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Входной файл: {report['params']['input_bytes']} байт")
+    for name, result in report["results"].items():
+        child = result.get("child_peak_rss_kb")
+        child = f", пик памяти программы {child} КБ" if child is not None else ""
+        print(f"{name}: {result['seconds']:.3f} с, пик памяти {result['peak_rss_kb']} КБ{child}")
+        if result.get("returncode"):
+            print(f"  ошибка ({result['returncode']}): {result.get('output', '')}")
+    print(f"Результаты сохранены в {args.output}")
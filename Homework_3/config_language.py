@@ -1,62 +1,328 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 import xml.etree.ElementTree as ET
 import re
 
+CONVERTER_VERSION = "2"  # Меняется при любом изменении результата преобразования; сбрасывает кэш
+CACHE_FILE = ".config_language_cache.json"  # Кэш пакетного режима в выходном каталоге
+REFERENCE = re.compile(r'\$\(([A-Z_]+)\)')  # Ссылка на константу $(NAME)
+NAME = re.compile(r'^[A-Z_]+$')  # Допустимое имя переменной или константы
+
 class ConfigSyntaxError(Exception):
     def __init__(self, message):
         super().__init__(message)
 
 def is_valid_name(name):
-    return re.match(r'^[A-Z_]+$', name) is not None 
+    return NAME.match(name) is not None
+
+def write_array(array_elem, write):
+    """Запись массива любой глубины вложенности через write(str) без рекурсии.
+
+    Вложенные массивы обходятся через явный стек итераторов, промежуточные строки
+    для уровней вложенности не создаются.
+    """
+    write('<< ')
+    stack = [iter(array_elem)]
+    separator = ''  # Разделитель перед следующим элементом текущего уровня
+    while stack:
+        for elem in stack[-1]:
+            tag = elem.tag
+            if tag == 'value':
+                write(separator + elem.text.strip())
+                separator = ', '
+            elif tag == 'array':
+                write(separator + '<< ')
+                separator = ''
+                stack.append(iter(elem))
+                break
+        else:
+            stack.pop()
+            write(' >>')
+            separator = ', '
 
 def array_to_string(array_elem):
-    values = []
-    for elem in array_elem:
-        if elem.tag == 'value':
-            values.append(elem.text.strip())
-        elif elem.tag == 'array':
-            values.append(array_to_string(elem)) 
-    return '<< ' + ', '.join(values) + ' >>'
+    parts = []
+    write_array(array_elem, parts.append)
+    return ''.join(parts)
+
+def element_to_line(elem):
+    """Строка конфигурационного языка для элемента верхнего уровня (до подстановки констант)."""
+    if elem.tag == 'variable':
+        var_name = elem.get('name')
+        var_value = elem.text.strip()
+        if not is_valid_name(var_name):
+            raise ConfigSyntaxError(f"Неверное имя переменной: {var_name}")
+        return f"var {var_name} := {var_value};"
+    elif elem.tag == 'array':
+        return array_to_string(elem)
+    elif elem.tag == 'constant':
+        const_name = elem.get('name')
+        const_value = elem.text.strip()
+        if not is_valid_name(const_name):
+            raise ConfigSyntaxError(f"Неверное имя константы: {const_name}")
+        return f"(define {const_name} {const_value})"
+    else:
+        raise ConfigSyntaxError(f"Неизвестный элемент: {elem.tag}")
+
+def resolve_constants(constants):
+    """Значения констант с раскрытыми ссылками $(NAME) на другие константы.
+
+    Константа может ссылаться на константы, определённые ниже по файлу; каждое значение
+    раскрывается один раз (обход в глубину без рекурсии). Циклические ссылки вызывают
+    ConfigSyntaxError, ссылки на неизвестные имена остаются как есть.
+    """
+    references = {name: [ref for ref in REFERENCE.findall(value) if ref in constants]
+                  for name, value in constants.items()}
+    resolved = {}
+    for start in constants:
+        if start in resolved:
+            continue
+        stack = [start]
+        visiting = {start}
+        while stack:
+            name = stack[-1]
+            pending = next((ref for ref in references[name] if ref not in resolved), None)
+            if pending is None:
+                resolved[name] = substitute_constants(constants[name], resolved)
+                visiting.discard(name)
+                stack.pop()
+            elif pending in visiting:
+                cycle = stack[stack.index(pending):] + [pending]
+                raise ConfigSyntaxError(f"Циклическая ссылка в константах: {' -> '.join(cycle)}")
+            else:
+                stack.append(pending)
+                visiting.add(pending)
+    return resolved
+
+def substitute_constants(line, resolved):
+    """Подстановка раскрытых значений констант вместо $(NAME) за один проход по строке."""
+    if '$(' not in line:
+        return line
+    return REFERENCE.sub(lambda match: resolved.get(match.group(1), match.group(0)), line)
 
 def convert_xml_to_custom_language(xml_root):
     result = []
     constants = {}
 
     for elem in xml_root:
-        if elem.tag == 'variable':
-            var_name = elem.get('name')
-            var_value = elem.text.strip()
-            if not is_valid_name(var_name):
-                raise ConfigSyntaxError(f"Неверное имя переменной: {var_name}")
-            result.append(f"var {var_name} := {var_value};")
-        elif elem.tag == 'array':
-            result.append(array_to_string(elem))  
-        elif elem.tag == 'constant':
-            const_name = elem.get('name')
-            const_value = elem.text.strip()
-            if not is_valid_name(const_name):
-                raise ConfigSyntaxError(f"Неверное имя константы: {const_name}")
-            result.append(f"(define {const_name} {const_value})")
-            constants[const_name] = const_value  
+        result.append(element_to_line(elem))
+        if elem.tag == 'constant':
+            constants[elem.get('name')] = elem.text.strip()
+
+    resolved = resolve_constants(constants)
+    return '\n'.join(substitute_constants(line, resolved) for line in result)
+
+def iter_top_level(source):
+    """Элементы верхнего уровня XML-файла по мере их закрытия (iterparse).
+
+    После обработки элемент удаляется из корня, поэтому в памяти находится
+    только один элемент верхнего уровня со своим поддеревом.
+    """
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 1:
+                yield elem
+                root.clear()
+
+def convert_xml_file(input_file, output_file):
+    """Потоковое преобразование XML-файла в файл конфигурационного языка.
+
+    Первый проход собирает только константы (значения нужны для подстановки и в строки,
+    стоящие до определения константы), второй проход пишет каждую строку в файл сразу
+    после закрытия элемента. Результат совпадает с convert_xml_to_custom_language; файл
+    пишется во временный и заменяет output_file только при успешном преобразовании.
+    """
+    constants = {}
+    for elem in iter_top_level(input_file):
+        if elem.tag == 'constant':
+            constants[elem.get('name')] = elem.text.strip()
+
+    resolved = resolve_constants(constants)
+
+    temporary = output_file + '.tmp'
+    try:
+        with open(temporary, 'w', encoding='utf-8') as f:
+            separator = ''
+            for elem in iter_top_level(input_file):
+                f.write(separator + substitute_constants(element_to_line(elem), resolved))
+                separator = '\n'
+    except BaseException:
+        os.remove(temporary)
+        raise
+    os.replace(temporary, output_file)
+
+def convert_file(input_file, output_file, stream=False):
+    """Преобразование одного файла (stream - потоково, иначе через дерево в памяти)."""
+    if stream:
+        convert_xml_file(input_file, output_file)
+        return
+    result = convert_xml_to_custom_language(ET.parse(input_file).getroot())
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(result)
+
+def collect_inputs(patterns):
+    """Пары (входной файл, путь результата относительно выходного каталога) для каталогов, шаблонов и файлов.
+
+    Для каталога и шаблона сохраняется структура относительно каталога (для шаблона - части пути
+    до первого спецсимвола), для отдельного файла берётся его имя. Отдельные файлы с одинаковыми
+    именами сохраняют путь относительно общего каталога всех отдельных файлов. Если два файла
+    всё равно дают один результат, вызывается ValueError.
+    """
+    files = [os.path.normpath(pattern) for pattern in patterns
+             if not os.path.isdir(pattern) and not glob.has_magic(pattern)]
+    basenames = Counter(os.path.basename(path) for path in dict.fromkeys(files))
+    if files and max(basenames.values()) > 1:
+        common = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+    inputs = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, _, names in os.walk(pattern):
+                for name in sorted(names):
+                    if name.endswith('.xml'):
+                        path = os.path.join(directory, name)
+                        inputs.setdefault(path, os.path.relpath(path, pattern))
+        elif glob.has_magic(pattern):
+            parts = pattern.split(os.sep)
+            fixed = next(i for i, part in enumerate(parts) if glob.has_magic(part))
+            base = os.sep.join(parts[:fixed]) or '.'
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                inputs.setdefault(path, os.path.relpath(path, base))
         else:
-            raise ConfigSyntaxError(f"Неизвестный элемент: {elem.tag}")
+            path = os.path.normpath(pattern)
+            name = os.path.basename(path)
+            inputs.setdefault(path, name if basenames[name] == 1 else os.path.relpath(os.path.abspath(path), common))
 
-    for i, line in enumerate(result):
-        for const_name, const_value in constants.items():
-            line = re.sub(r'\$\(' + re.escape(const_name) + r'\)', const_value, line)
-        result[i] = line
+    outputs = {}
+    for path, relative in inputs.items():
+        relative = os.path.splitext(relative)[0] + '.txt'
+        if outputs.setdefault(relative, path) != path:
+            raise ValueError(f"Файлы {outputs[relative]} и {path} дают один результат {relative}")
+    return [(path, relative) for relative, path in outputs.items()]
 
-    return '\n'.join(result)
+def file_digest(path, chunk_size=1 << 20):
+    """Хеш содержимого файла вместе с версией конвертера."""
+    digest = hashlib.sha256(CONVERTER_VERSION.encode())
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _convert_batch_item(input_file, output_file, stream):
+    """Преобразование одного файла пакета в процессе-исполнителе, возвращает текст ошибки или None."""
+    try:
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        convert_file(input_file, output_file, stream)
+    except ConfigSyntaxError as e:
+        return f"Ошибка синтаксиса: {e}"
+    except ET.ParseError:
+        return "Ошибка при разборе XML-файла"
+    except Exception as e:
+        return f"Ошибка: {e}"
+    return None
+
+def convert_batch(patterns, output_dir, jobs=None, stream=False, cache_path=None):
+    """Пакетное преобразование файлов по каталогам и шаблонам в пуле процессов.
+
+    Файлы, у которых хеш содержимого (с версией конвертера) совпадает с записанным в кэше
+    и результат существует, пропускаются. Возвращает словарь со списками converted, skipped,
+    failed (пары файл-ошибка) и временем выполнения seconds.
+    """
+    start = time.perf_counter()
+    cache_path = cache_path or os.path.join(output_dir, CACHE_FILE)
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cache = {}
+
+    report = {"converted": [], "skipped": [], "failed": []}
+    work = []
+    for input_file, relative in collect_inputs(patterns):
+        output_file = os.path.join(output_dir, relative)
+        try:
+            digest = file_digest(input_file)
+        except OSError as e:
+            report["failed"].append((input_file, f"Ошибка: {e}"))
+            continue
+        if cache.get(relative) == digest and os.path.exists(output_file):
+            report["skipped"].append(input_file)
+        else:
+            work.append((input_file, output_file, relative, digest))
+
+    inputs = [item[0] for item in work]
+    outputs = [item[1] for item in work]
+    if jobs == 1 or len(work) < 2:
+        errors = list(map(_convert_batch_item, inputs, outputs, [stream] * len(work)))
+    else:
+        workers = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(workers) as pool:  # Файлы передаются пачками, чтобы не платить за каждый
+            errors = list(pool.map(_convert_batch_item, inputs, outputs, [stream] * len(work),
+                                   chunksize=max(1, len(work) // (4 * workers))))
+    for (input_file, _, relative, digest), error in zip(work, errors):
+        if error is None:
+            cache[relative] = digest
+            report["converted"].append(input_file)
+        else:
+            cache.pop(relative, None)
+            report["failed"].append((input_file, error))
+
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=0, sort_keys=True)
+    os.replace(cache_path + '.tmp', cache_path)
+    report["seconds"] = time.perf_counter() - start
+    return report
 
 def main():
-    if len(sys.argv) != 3:
-        print("Использование: python task_3.py <input_file.xml> <output_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Преобразование XML в учебный конфигурационный язык.")
+    parser.add_argument("input_file", nargs="?", help="Входной XML-файл")
+    parser.add_argument("output_file", nargs="?", help="Файл результата")
+    parser.add_argument("--stream", action="store_true",
+                        help="Потоковое преобразование (iterparse) с ограниченным расходом памяти")
+    parser.add_argument("--batch", nargs="+", metavar="PATH",
+                        help="Пакетный режим: каталоги, шаблоны (configs/**/*.xml) или файлы")
+    parser.add_argument("--output-dir", help="Выходной каталог пакетного режима")
+    parser.add_argument("--jobs", type=int, help="Число процессов пакетного режима (по умолчанию - число ядер)")
+    parser.add_argument("--cache", help=f"Файл кэша пакетного режима (по умолчанию {CACHE_FILE} в выходном каталоге)")
+    args = parser.parse_args()
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    if args.batch:
+        if not args.output_dir:
+            parser.error("--batch требует --output-dir")
+        try:
+            report = convert_batch(args.batch, args.output_dir, args.jobs, args.stream, args.cache)
+        except ValueError as e:  # Несколько входных файлов с одним результатом
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+        for input_file, error in report["failed"]:
+            print(f"{input_file}: {error}")
+        print(f"Преобразовано: {len(report['converted'])}, пропущено: {len(report['skipped'])}, "
+              f"ошибок: {len(report['failed'])}, время: {report['seconds']:.2f} с")
+        sys.exit(1 if report["failed"] else 0)
+    if not args.input_file or not args.output_file:
+        parser.error("нужны input_file и output_file (или --batch)")
+
+    input_file = args.input_file
+    output_file = args.output_file
 
     try:
+        if args.stream:
+            convert_xml_file(input_file, output_file)
+            return
         tree = ET.parse(input_file)
         root = tree.getroot()
     except FileNotFoundError:
@@ -65,6 +331,12 @@ def main():
     except ET.ParseError:
         print(f"Ошибка при разборе XML-файла {input_file}.")
         sys.exit(1)
+    except ConfigSyntaxError as e:
+        print(f"Ошибка синтаксиса: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
 
     try:
         result = convert_xml_to_custom_language(root)
@@ -0,0 +1,142 @@
+import json
+import marshal
+import os
+import pickle
+import re
+import sys
+
+from config_language import ConfigSyntaxError
+
+LOADER_VERSION = 1  # Меняется при изменении формата результата; сбрасывает кэши
+CACHE_FORMATS = {"marshal": marshal, "pickle": pickle}
+INTEGER = re.compile(r'[+-]?\d+')
+FLOAT = re.compile(r'[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?')  # Без 1_0, nan, inf
+
+def scalar(text):
+    """Значение из текста: целое, вещественное или строка."""
+    if INTEGER.fullmatch(text):
+        return int(text)
+    if FLOAT.fullmatch(text):
+        return float(text)
+    return text
+
+def _line(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+def _statement_end(text, pos, terminator):
+    """Позиция terminator в конце строки, начинающейся с pos."""
+    line_end = text.find('\n', pos)
+    if line_end < 0:
+        line_end = len(text)
+    end = line_end - len(terminator)
+    if end >= pos and text.startswith(terminator, end):
+        return end
+    raise ConfigSyntaxError(f"Строка {_line(text, pos)}: ожидается '{terminator}' в конце")
+
+def _parse_array(text, pos):
+    """Массив << ... >> начиная с позиции pos, возвращает (список, позиция после массива)."""
+    root = []
+    stack = [root]
+    pos += 2
+    length = len(text)
+    while True:
+        while pos < length and text[pos] == ' ':
+            pos += 1
+        if pos >= length:
+            raise ConfigSyntaxError(f"Строка {_line(text, pos)}: незакрытый массив")
+        if text.startswith('>>', pos):
+            pos += 2
+            stack.pop()
+            if not stack:
+                return root, pos
+            while pos < length and text[pos] == ' ':
+                pos += 1
+            if pos < length and text[pos] == ',':
+                pos += 1
+        elif text.startswith('<<', pos):
+            nested = []
+            stack[-1].append(nested)
+            stack.append(nested)
+            pos += 2
+        else:
+            close = text.find('>>', pos)
+            if close < 0:
+                raise ConfigSyntaxError(f"Строка {_line(text, pos)}: незакрытый массив")
+            comma = text.find(',', pos, close)
+            end = close if comma < 0 else comma
+            stack[-1].append(scalar(text[pos:end].strip()))
+            pos = close if comma < 0 else comma + 1
+
+def parse_config(text):
+    """Разбор текста конфигурационного языка за один проход.
+
+    Возвращает словарь {"constants": {имя: значение}, "variables": {имя: значение},
+    "arrays": [список, ...]}; значения приводятся к int или float, если это возможно.
+    """
+    result = {"constants": {}, "variables": {}, "arrays": []}
+    pos = 0
+    length = len(text)
+    while pos < length:
+        char = text[pos]
+        if char in ' \t\r\n':
+            pos += 1
+        elif text.startswith('var ', pos):
+            end = _statement_end(text, pos, ';')
+            assign = text.find(' := ', pos, end)
+            if assign < 0:
+                raise ConfigSyntaxError(f"Строка {_line(text, pos)}: ожидается ':='")
+            result["variables"][text[pos + 4:assign]] = scalar(text[assign + 4:end])
+            pos = end + 1
+        elif text.startswith('(define ', pos):
+            end = _statement_end(text, pos, ')')
+            name, _, value = text[pos + 8:end].partition(' ')
+            result["constants"][name] = scalar(value)
+            pos = end + 1
+        elif text.startswith('<<', pos):
+            array, pos = _parse_array(text, pos)
+            result["arrays"].append(array)
+        else:
+            raise ConfigSyntaxError(f"Строка {_line(text, pos)}: неизвестная конструкция")
+    return result
+
+def load_config(path, cache=None):
+    """Загрузка файла конфигурационного языка.
+
+    При cache="marshal" или "pickle" результат разбора сохраняется рядом с файлом (path + ".cache")
+    и при следующих загрузках читается оттуда без разбора, пока у исходного файла не изменились
+    размер и время изменения.
+    """
+    if cache is None:
+        with open(path, encoding='utf-8') as f:
+            return parse_config(f.read())
+    serializer = CACHE_FORMATS[cache]
+    cache_path = path + '.cache'
+    stat = os.stat(path)
+    key = [LOADER_VERSION, cache, stat.st_size, stat.st_mtime_ns]
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, result = serializer.load(f)
+        if cached_key == key:
+            return result
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        pass
+    with open(path, encoding='utf-8') as f:
+        result = parse_config(f.read())
+    try:
+        with open(cache_path + '.tmp', 'wb') as f:
+            serializer.dump((key, result), f)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError:  # Каталог только для чтения: работаем без кэша
+        pass
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Использование: python config_loader.py <файл> [marshal|pickle]")
+        sys.exit(1)
+    try:
+        config = load_config(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    except ConfigSyntaxError as e:
+        print(f"Ошибка синтаксиса: {e}")
+        sys.exit(1)
+    print(json.dumps(config, ensure_ascii=False, indent=2))
@@ -1,5 +1,9 @@
+import os
+import tempfile
 import xml.etree.ElementTree as ET
-from config_language import convert_xml_to_custom_language, ConfigSyntaxError 
+from benchmark import generate_config
+from config_loader import load_config, parse_config
+from config_language import convert_batch, convert_xml_to_custom_language, convert_xml_file, ConfigSyntaxError 
 
 def run_test(test_input, expected_output):
     """Запускает тест и выводит результат."""
@@ -97,6 +101,122 @@ def main():
         expected_nested_output = "<< 1, 2, << 3, 4, << 5 >> >> >>"
         run_test(nested_array_config, expected_nested_output)
 
+        # Тест 8: Потоковое преобразование файла совпадает с преобразованием дерева
+        stream_config = '''<root>
+            <variable name="AREA">$(PI) * $(RADIUS)</variable>
+            <constant name="PI">3.14</constant>
+            <array><value>1</value><array><value>2</value></array></array>
+        </root>'''
+        with tempfile.TemporaryDirectory() as tmp:
+            input_path = os.path.join(tmp, 'input.xml')
+            output_path = os.path.join(tmp, 'output.txt')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write(stream_config)
+            convert_xml_file(input_path, output_path)
+            with open(output_path, encoding='utf-8') as f:
+                streamed = f.read()
+        expected = convert_xml_to_custom_language(ET.fromstring(stream_config))
+        assert streamed == expected == "var AREA := 3.14 * $(RADIUS);\n(define PI 3.14)\n<< 1, << 2 >> >>", streamed
+        print(f"Тест потокового преобразования прошел: {streamed}")
+
+        # Тест 9: Ссылки констант друг на друга, в том числе вперёд по файлу
+        chained_config = '''<root>
+            <constant name="URL">http://$(HOST):$(PORT)</constant>
+            <variable name="ENDPOINT">$(URL)/api</variable>
+            <constant name="HOST">$(DOMAIN)</constant>
+            <constant name="DOMAIN">example.org</constant>
+            <constant name="PORT">8080</constant>
+        </root>'''
+        run_test(chained_config, "(define URL http://example.org:8080)\nvar ENDPOINT := http://example.org:8080/api;\n"
+                                 "(define HOST example.org)\n(define DOMAIN example.org)\n(define PORT 8080)")
+
+        # Тест 10: Циклические ссылки констант
+        cyclic_config = '''<root>
+            <constant name="A">$(B)</constant>
+            <constant name="B">x $(C)</constant>
+            <constant name="C">$(A)</constant>
+        </root>'''
+        try:
+            run_test(cyclic_config, "")
+            raise AssertionError("Цикл констант не обнаружен")
+        except ConfigSyntaxError as e:
+            assert "A -> B -> C -> A" in str(e), e
+            print(f"Тест на циклические ссылки прошел: {e}")
+
+        # Тест 11: Пакетное преобразование с кэшем по хешу содержимого
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, 'in', 'sub'))
+            for name, value in [('a.xml', '1'), (os.path.join('sub', 'b.xml'), '2')]:
+                with open(os.path.join(tmp, 'in', name), 'w', encoding='utf-8') as f:
+                    f.write(f'<root><variable name="X">{value}</variable></root>')
+            output_dir = os.path.join(tmp, 'out')
+            first = convert_batch([os.path.join(tmp, 'in')], output_dir, jobs=2)
+            second = convert_batch([os.path.join(tmp, 'in')], output_dir, jobs=2)
+            with open(os.path.join(tmp, 'in', 'a.xml'), 'w', encoding='utf-8') as f:
+                f.write('<root><variable name="X">3</variable></root>')
+            third = convert_batch([os.path.join(tmp, 'in', '*.xml')], output_dir, jobs=1)
+            with open(os.path.join(output_dir, 'sub', 'b.txt'), encoding='utf-8') as f:
+                assert f.read() == "var X := 2;"
+        assert (len(first["converted"]), len(first["skipped"])) == (2, 0)
+        assert (len(second["converted"]), len(second["skipped"])) == (0, 2)
+        assert (len(third["converted"]), len(third["skipped"]), third["failed"]) == (1, 0, [])
+
+        # Отдельные файлы с одинаковыми именами из разных каталогов
+        with tempfile.TemporaryDirectory() as tmp:
+            for directory, value in (('a', '1'), ('b', '2')):
+                os.makedirs(os.path.join(tmp, directory))
+                with open(os.path.join(tmp, directory, 'x.xml'), 'w', encoding='utf-8') as f:
+                    f.write(f'<root><variable name="X">{value}</variable></root>')
+            files = [os.path.join(tmp, 'a', 'x.xml'), os.path.join(tmp, 'b', 'x.xml')]
+            output_dir = os.path.join(tmp, 'out')
+            for _ in range(2):
+                report = convert_batch(files, output_dir, jobs=2)
+            for directory, value in (('a', '1'), ('b', '2')):
+                with open(os.path.join(output_dir, directory, 'x.txt'), encoding='utf-8') as f:
+                    assert f.read() == f"var X := {value};"
+            assert (len(report["converted"]), len(report["skipped"])) == (0, 2)  # Кэш не перезаписывается
+            try:
+                convert_batch([os.path.join(tmp, 'a')] + files[1:], output_dir)  # x.xml из каталога a и файл b/x.xml
+                raise AssertionError("Одинаковый результат двух файлов не обнаружен")
+            except ValueError as e:
+                assert "x.txt" in str(e), e
+        print("Тест пакетного преобразования прошел")
+
+        # Тест 12: Массив глубже предела рекурсии Python
+        depth = 5000
+        deep_config = '<root>' + '<array><value>1</value>' * depth + '</array>' * depth + '</root>'
+        result = convert_xml_to_custom_language(ET.fromstring(deep_config))
+        assert result == '<< 1, ' * (depth - 1) + '<< 1 >>' + ' >>' * (depth - 1), result[:100]
+        print(f"Тест глубоко вложенного массива прошел: глубина {depth}")
+
+        # Тест 13: Обратный разбор конфигурационного языка и кэш результата
+        text = convert_xml_to_custom_language(ET.fromstring(computation_config)) + "\n<<  >>\n<< << 1, x y >>, 2.5 >>"
+        expected = {"constants": {"EULER_NUMBER": 2.718}, "variables": {"E_VAR": 2.718},
+                    "arrays": [[10, 20, 30], [], [[1, "x y"], 2.5]]}
+        assert parse_config(text) == expected, parse_config(text)
+        assert parse_config("var A := 1_0;\nvar B := nan;\nvar C := -1.5e3;\n(define D inf)") == \
+            {"constants": {"D": "inf"}, "variables": {"A": "1_0", "B": "nan", "C": -1500.0}, "arrays": []}
+        try:
+            parse_config("var A := 1\nvar B := 2;\n")
+            assert False, "Ожидалась ошибка синтаксиса"
+        except ConfigSyntaxError as e:
+            assert "Строка 1" in str(e), e
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'config.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            for cache in ("marshal", "pickle"):
+                assert load_config(path, cache) == expected and os.path.exists(path + '.cache')
+                assert load_config(path, cache) == expected  # Из кэша
+        print("Тест обратного разбора прошел")
+
+        # Тест 14: Синтетический конфиг бенчмарка преобразуется без нераскрытых ссылок
+        synthetic = ET.fromstring(''.join(generate_config(50, 20, 120, depth=30, arrays=2, width=3)))
+        result = convert_xml_to_custom_language(synthetic).split('\n')
+        assert len(result) == 72 and '$(' not in ''.join(result), result[:5]
+        assert result[-1].count('<<') == 31, result[-1][:100]
+        print("Тест синтетического конфига прошел")
+
         print("Все тесты выполнены успешно!")  
 
     except Exception as e:
@@ -1,74 +1,231 @@
 import argparse
 import csv
+import io
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from operator import length_hint
+from opcodes import INSTRUCTION_SIZE, OPCODES, WORD
 
-# Функция для записи логов операции
-def log_operation(log_path, operation_code, *args):
-    if log_path is not None:
-        with open(log_path, "a", encoding="utf-8") as log_file:
-            log_file.write(f"A={operation_code},B={args[0]},C={args[1]}\n")
-
-# Функция сериализации команды в бинарный формат
-def serializer(cmd, fields, size):
-    bits = 0
-    bits |= cmd  # Устанавливаем код операции в младшие биты
-    for value, offset in fields:
-        bits |= (value << offset)  # Добавляем операнды в соответствующие биты
-    return bits.to_bytes(size, "little")
-
-# Основная функция ассемблера
-def assembler(instructions, log_path=None):
-    byte_code = []
-    for operation, *args in instructions:
-        if operation == "load_const":
-            B, C = args
-            # Команда "Загрузка константы" - A=6, B=Адрес, C=Константа
-            byte_code += serializer(6, ((B, 4), (C, 10)), 6)
-            log_operation(log_path, 6, B, C)
-        elif operation == "read_mem":
-            B, C = args
-            # Команда "Чтение значения из памяти" - A=10, B=Адрес, C=Адрес в памяти
-            byte_code += serializer(10, ((B, 4), (C, 10)), 6)
-            log_operation(log_path, 10, B, C)
-        elif operation == "write_mem":
-            B, C, D = args
-            # Команда "Запись значения в память" - A=12, B=Смещение, C=Адрес, D=Адрес в регистре
-            byte_code += serializer(12, ((B, 4), (C, 11), (D, 17)), 6)
-            log_operation(log_path, 12, B, C, D)
-        elif operation == "mod_mem":
-            B, C, D, E = args
-            # Команда "Бинарная операция: взятие остатка" - A=14, B=Смещение, C=Адрес, D=Регистр, E=Регистр
-            byte_code += serializer(14, ((B, 4), (C, 11), (D, 17), (E, 23)), 6)
-            log_operation(log_path, 14, B, C, D, E)
-    return byte_code
+CHUNK_SIZE = 65536  # Число команд в одном блоке потоковой сборки
+SHARD_SIZE = 4 << 20  # Примерный размер участка CSV файла (байт) для одного задания параллельной сборки
+LOG_FORMATS = ("text", "binary")
+LOG_BATCH = 4096  # Число записей лога, накапливаемых перед одной записью в файл
+LOG_RECORD = struct.Struct("<B4I")  # Двоичная запись лога: код операции и операнды B, C, D, E (отсутствующие = 0)
+# Строка текстового лога для команды с 2, 3 и 4 операндами
+_LOG_LINES = {count: ",".join(["A={}"] + [f"{name}={{}}" for name in "BCDE"[:count]]) + "\n" for count in (2, 3, 4)}
 
-# Функция для чтения инструкций из CSV файла и их сборки
-def assemble(instructions_path: str, log_path=None):
-    instructions = []
-    with open(instructions_path, "r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
+class OperationLog:
+    """Лог ассемблера: один открытый файл на всю сборку, записи сбрасываются пакетами по LOG_BATCH.
+
+    Текстовый лог дописывается строками "A=..,B=..,C=..[,D=..][,E=..]", двоичный - записями LOG_RECORD.
+    Вместо пути можно передать открытый поток stream (например, io.StringIO); он не закрывается в close().
+    """
+    def __init__(self, log_path, log_format="text", batch_size=LOG_BATCH, stream=None):
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Неизвестный формат лога: {log_format}")
+        self.binary = log_format == "binary"
+        self.batch_size = batch_size
+        self.pending = []
+        self.owns_file = stream is None
+        if stream is not None:
+            self.file = stream
+        elif self.binary:
+            self.file = open(log_path, "ab")
+        else:
+            self.file = open(log_path, "a", encoding="utf-8")
+
+    def write(self, operation_code, args):
+        if self.binary:
+            self.pending.append(LOG_RECORD.pack(operation_code, *args, *(0,) * (4 - len(args))))
+        else:
+            self.pending.append(_LOG_LINES[len(args)].format(operation_code, *args))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write((b"" if self.binary else "").join(self.pending))
+            self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Чтение двоичного лога: кортежи (код операции, B, C, D, E)
+def read_binary_log(log_path):
+    with open(log_path, "rb") as log_file:
+        return list(LOG_RECORD.iter_unpack(log_file.read()))
+
+# Функция упаковки операндов команды в число по смещениям полей из таблицы команд
+def field_packer(code, fields):
+    offsets = [offset for offset, _ in fields]
+    if len(offsets) == 2:
+        b, c = offsets
+        return lambda B, C: code | B << b | C << c
+    if len(offsets) == 3:
+        b, c, d = offsets
+        return lambda B, C, D: code | B << b | C << c | D << d
+    if len(offsets) == 4:
+        b, c, d, e = offsets
+        return lambda B, C, D, E: code | B << b | C << c | D << d | E << e
+    raise ValueError(f"Неподдерживаемое число полей команды: {len(offsets)}")
+
+# Имя команды -> (код операции, функция упаковки операндов)
+PACKERS = {name: (code, field_packer(code, fields)) for name, (code, fields) in OPCODES.items()}
+
+# Потоковое кодирование: генератор блоков байт-кода (bytearray) не более чем по chunk_size команд.
+# Каждый блок выделяется один раз и отдаётся потребителю целиком, память не зависит от размера программы.
+# Вместо log_path можно передать готовый OperationLog в log.
+def encode_chunks(instructions, log_path=None, log_format="text", chunk_size=CHUNK_SIZE, log=None):
+    if chunk_size < 1:
+        raise ValueError(f"Неверный размер блока: {chunk_size}")
+    pack_into = WORD.pack_into
+    if log is None and log_path is not None:
+        log = OperationLog(log_path, log_format)
+    try:
+        byte_code = bytearray(INSTRUCTION_SIZE * chunk_size)
+        position = 0
+        for instruction in instructions:
+            packer = PACKERS.get(instruction[0])
+            if packer is None:  # Неизвестные команды пропускаются
+                continue
+            code, pack_fields = packer
+            try:
+                bits = pack_fields(*instruction[1:])
+                pack_into(byte_code, position, bits & 0xFFFFFFFF, bits >> 32)
+            except TypeError:
+                raise ValueError(f"Неверные операнды команды: {list(instruction)}") from None
+            except struct.error:
+                raise OverflowError(f"Команда не помещается в {INSTRUCTION_SIZE} байт: {list(instruction)}") from None
+            position += INSTRUCTION_SIZE
+            if log is not None:
+                log.write(code, instruction[1:])
+            if position == len(byte_code):
+                yield byte_code
+                byte_code = bytearray(INSTRUCTION_SIZE * chunk_size)
+                position = 0
+        if position:
+            del byte_code[position:]
+            yield byte_code
+    finally:
+        if log is not None:
+            log.close()
+
+# Основная функция ассемблера: команды (список или генератор) кодируются блоками не больше CHUNK_SIZE
+def assembler(instructions, log_path=None, log_format="text"):
+    chunk_size = min(max(length_hint(instructions, CHUNK_SIZE), 1), CHUNK_SIZE)  # Для списка - точный размер
+    chunks = list(encode_chunks(instructions, log_path, log_format, chunk_size))
+    if len(chunks) == 1:
+        return chunks[0]
+    return bytearray().join(chunks)
+
+# Разбор строк CSV в инструкции (генератор), пустые строки пропускаются
+def parse_rows(lines):
+    for row in csv.reader(lines):
+        if row:
             operation = row[0].strip()
             args = [int(x) if x.isdigit() else x for x in row[1:]]
-            instructions.append([operation] + args)
-    return assembler(instructions, log_path)
+            yield [operation] + args
+
+# Построчное чтение инструкций из CSV файла (генератор)
+def read_instructions(instructions_path):
+    with open(instructions_path, "r", encoding="utf-8") as f:
+        yield from parse_rows(f)
+
+# Функция для чтения инструкций из CSV файла и их сборки
+def assemble(instructions_path: str, log_path=None, log_format="text"):
+    return bytearray().join(encode_chunks(read_instructions(instructions_path), log_path, log_format))
+
+# Потоковая сборка CSV файла в бинарный файл блоками, возвращает число собранных команд
+def assemble_to_file(instructions_path, binary_path, log_path=None, log_format="text", chunk_size=CHUNK_SIZE):
+    size = 0
+    with open(binary_path, "wb") as binary_file:
+        for chunk in encode_chunks(read_instructions(instructions_path), log_path, log_format, chunk_size):
+            binary_file.write(chunk)
+            size += len(chunk)
+    return size // INSTRUCTION_SIZE
 
 # Сохранение бинарных данных в файл
 def save_to_bin(assembled_instructions, binary_path):
     with open(binary_path, "wb") as binary_file:
         binary_file.write(bytes(assembled_instructions))
 
+# Разбиение CSV файла на участки (начало, конец) в байтах по границам строк
+def split_lines(instructions_path, shards):
+    size = os.path.getsize(instructions_path)
+    bounds = [0]
+    with open(instructions_path, "rb") as f:
+        for shard in range(1, shards):
+            f.seek(max(size * shard // shards, bounds[-1]))
+            f.readline()  # Дочитываем строку, чтобы участок начинался с новой строки
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+# Сборка одного участка CSV файла в процессе-исполнителе: (байт-код, содержимое лога или None)
+def _assemble_shard(instructions_path, start, end, log_format, logging):
+    with open(instructions_path, "rb") as f:
+        f.seek(start)
+        lines = f.read(end - start).decode("utf-8").splitlines()
+    stream = (io.BytesIO() if log_format == "binary" else io.StringIO()) if logging else None
+    log = OperationLog(None, log_format, stream=stream) if logging else None
+    byte_code = bytearray().join(encode_chunks(parse_rows(lines), chunk_size=max(len(lines), 1), log=log))
+    return byte_code, stream.getvalue() if logging else None
+
+# Параллельная сборка: участки CSV кодируются в пуле из jobs процессов, а байт-код и лог
+# записываются в порядке участков, поэтому результат совпадает с последовательной сборкой.
+# Возвращает число собранных команд.
+def assemble_parallel(instructions_path, binary_path, log_path=None, log_format="text", jobs=None, shard_size=SHARD_SIZE):
+    jobs = jobs or os.cpu_count() or 1
+    shards = max(jobs, os.path.getsize(instructions_path) // shard_size + 1)
+    ranges = split_lines(instructions_path, shards)
+    size = 0
+    log_file = None
+    if log_path is not None:
+        log_file = open(log_path, "ab") if log_format == "binary" else open(log_path, "a", encoding="utf-8")
+    try:
+        with open(binary_path, "wb") as binary_file, ProcessPoolExecutor(jobs) as pool:
+            futures = [pool.submit(_assemble_shard, instructions_path, start, end, log_format, log_file is not None)
+                       for start, end in ranges]
+            for future in futures:
+                byte_code, log_data = future.result()
+                binary_file.write(byte_code)
+                size += len(byte_code)
+                if log_file is not None:
+                    log_file.write(log_data)
+    finally:
+        if log_file is not None:
+            log_file.close()
+    return size // INSTRUCTION_SIZE
+
 # Главная точка входа
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Assembling the instructions CSV file to the byte-code.")
     parser.add_argument("instructions_path", help="Path to the instructions CSV file")
     parser.add_argument("binary_path", help="Path to the binary file (bin)")
     parser.add_argument("log_path", help="Path to the log file (csv)")
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="text", help="Log as CSV text or as compact binary records")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of instructions encoded and written per block")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes (1 - serial assembly)")
     args = parser.parse_args()
     
     # Создание лог файла
-    with open(args.log_path, "w", encoding="utf-8") as log_file:
-        log_file.write(f"Operation code,Constant/Address,Address\n")
+    if args.log_format == "text":
+        with open(args.log_path, "w", encoding="utf-8") as log_file:
+            log_file.write(f"Operation code,B,C,D,E\n")
+    else:
+        open(args.log_path, "wb").close()
     
-    # Ассемблирование инструкций и сохранение в бинарный файл
-    result = assemble(args.instructions_path, args.log_path)
-    save_to_bin(result, args.binary_path)
+    # Потоковое (или параллельное) ассемблирование инструкций в бинарный файл
+    if args.jobs > 1:
+        assemble_parallel(args.instructions_path, args.binary_path, args.log_path, args.log_format, args.jobs)
+    else:
+        assemble_to_file(args.instructions_path, args.binary_path, args.log_path, args.log_format, args.chunk_size)
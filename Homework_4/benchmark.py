@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Нет на Windows: пиковая память не измеряется
+    resource = None
+
+from assembler import assemble_to_file
+from interpreter import ENGINES, MEMORY_SIZE, REGISTER_COUNT, create_memory, decode, dump_memory
+from opcodes import OPCODES
+
+DIVISOR_REGISTER = REGISTER_COUNT - 1  # Регистр с ненулевым делителем для mod_mem, не перезаписывается
+DEFAULT_MIX = "load_const=1,read_mem=1,write_mem=1,mod_mem=1"
+
+def parse_mix(mix):
+    """Разбор доли команд вида "load_const=2,mod_mem=1" в словарь {имя: вес}."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPCODES:
+            raise ValueError(f"Неизвестная команда в смеси: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def generate_program(size, mix, memory_size=MEMORY_SIZE, seed=0):
+    """Генерация size корректных команд со случайными операндами (генератор кортежей).
+
+    Константы меньше memory_size, поэтому значения регистров и памяти всегда являются
+    допустимыми адресами для mod_mem, а делитель берётся из регистра DIVISOR_REGISTER.
+    """
+    if size < 1:
+        return
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    registers = DIVISOR_REGISTER  # Регистры 0..30 для данных
+    write_limit = min(memory_size, 95)  # Адрес write_mem/mod_mem = B (6 бит) + C (5 бит)
+    yield ("load_const", DIVISOR_REGISTER, 7)
+    for name in rng.choices(names, weights, k=size - 1):
+        if name == "load_const":
+            yield (name, rng.randrange(registers), rng.randrange(min(memory_size, 1 << 20)))
+        elif name == "read_mem":
+            yield (name, rng.randrange(registers), rng.randrange(min(memory_size, 1 << 20)))
+        else:
+            address = rng.randrange(write_limit)
+            B, C = min(address, 63), address - min(address, 63)
+            if name == "write_mem":
+                yield (name, B, C, rng.randrange(registers))
+            else:
+                yield (name, B, C, rng.randrange(registers), DIVISOR_REGISTER)
+
+def write_program(instructions, csv_path):
+    with open(csv_path, "w", encoding="utf-8") as f:
+        for instruction in instructions:
+            f.write(",".join(map(str, instruction)) + "\n")
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS считает в байтах
+
+def _bench_assemble(csv_path, binary_path):
+    start = time.perf_counter()
+    count = assemble_to_file(csv_path, binary_path)
+    return {"seconds": time.perf_counter() - start, "instructions": count}
+
+def _bench_engine(binary_path, engine, memory_size):
+    memory = create_memory(memory_size)
+    registers = create_memory(REGISTER_COUNT)
+    start = time.perf_counter()
+    with open(binary_path, "rb") as binary_file:
+        table = decode(binary_file.read())
+    decoded = time.perf_counter()
+    steps, errors, ok = ENGINES[engine](table, memory, registers)
+    finish = time.perf_counter()
+    return {"seconds": finish - start, "decode_seconds": decoded - start, "instructions": steps,
+            "errors": errors, "completed": ok}
+
+def _bench_dump(memory_size, result_path):
+    memory = create_memory(memory_size)
+    start = time.perf_counter()
+    dump_memory(memory, (0, memory_size - 1), result_path)
+    return {"seconds": time.perf_counter() - start, "addresses": memory_size}
+
+def _measured(func, args):
+    result = func(*args)
+    result["peak_rss_kb"] = _peak_rss_kb()
+    return result
+
+def measure(func, *args):
+    """Запуск замера в отдельном процессе, чтобы пиковая память относилась только к нему."""
+    with ProcessPoolExecutor(1) as pool:
+        result = pool.submit(_measured, func, args).result()
+    if result.get("instructions") and result["seconds"] > 0:
+        result["instructions_per_second"] = result["instructions"] / result["seconds"]
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(size, mix=DEFAULT_MIX, memory_size=MEMORY_SIZE, engines=tuple(ENGINES), seed=0):
+    """Полный прогон: генерация, сборка, выполнение каждым исполнителем и выгрузка памяти."""
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"size": size, "mix": mix, "memory_size": memory_size, "seed": seed},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "program.csv")
+        binary_path = os.path.join(tmp, "program.bin")
+        write_program(generate_program(size, parse_mix(mix), memory_size, seed), csv_path)
+        report["results"]["assemble"] = measure(_bench_assemble, csv_path, binary_path)
+        for engine in engines:
+            report["results"][f"interpreter_{engine}"] = measure(_bench_engine, binary_path, engine, memory_size)
+        report["results"]["dump"] = measure(_bench_dump, memory_size, os.path.join(tmp, "result.csv"))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarking the assembler and the interpreter on a generated program.")
+    parser.add_argument("--size", type=int, default=100000, help="Number of instructions in the generated program")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Opcode weights, e.g. load_const=2,mod_mem=1")
+    parser.add_argument("--memory-size", type=int, default=MEMORY_SIZE, help="Number of VM memory cells")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated interpreter engines to measure")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the program generator")
+    parser.add_argument("--output", default="benchmark.json", help="Path to the JSON results file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.size, args.mix, args.memory_size, args.engines.split(","), args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    for name, result in report["results"].items():
+        rate = result.get("instructions_per_second")
+        rate = f", {rate:,.0f} команд/с" if rate else ""
+        print(f"{name}: {result['seconds']:.3f} с{rate}, пик памяти {result['peak_rss_kb']} КБ")
+    print(f"Результаты сохранены в {args.output}")
@@ -1,71 +1,558 @@
 import argparse
+import csv
+import gc
+import mmap
+import sys
+from array import array
+from bisect import bisect_right
+from functools import partial
+from operator import length_hint
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для векторного исполнителя
+    np = None
+
+from opcodes import INSTRUCTION_SIZE, OPCODES, WORD
+
+VERBOSITY_LEVELS = ("silent", "summary", "trace")
+MEMORY_SIZE = 64  # Размер памяти по умолчанию (ячеек)
+REGISTER_COUNT = 32  # Индекс регистра занимает 5 бит
+DUMP_CHUNK = 65536  # Число адресов, записываемых в файл-результат за один вызов write()
+VECTOR_MIN_RUN = 128  # Более короткие серии и части серий выгоднее выполнять скалярно
+VECTOR_WINDOW = 8192  # Число команд серии, планируемых для векторного выполнения за один раз
+TRACE_BATCH = 4096  # Число сообщений трассировки, накапливаемых перед одной записью
 
 def popcnt(value):
     """Подсчет количества установленных битов (единиц) в числе."""
     return bin(value).count('1')
 
-def interpreter(binary_path, result_path, memory_range):
-    # Инициализация памяти и регистров
-    memory = [0] * 64  # 64 ячейки памяти
-    registers = [0] * 32  # 32 регистра
+def _field_layout(fields):
+    """Сдвиги и маски полей B, C, D, E команды; отсутствующие поля декодируются как 0."""
+    layout = []
+    for offset, width in fields:
+        layout += (offset, (1 << width) - 1)
+    return tuple(layout) + (0, 0) * (4 - len(fields))
 
-    with open(binary_path, "rb") as binary_file:
-        byte_code = binary_file.read()
+# Код операции -> (сдвиг B, маска B, ..., сдвиг E, маска E); неизвестные коды без полей
+_LAYOUTS = [(0,) * 8] * 16
+for _code, _fields in OPCODES.values():
+    _LAYOUTS[_code] = _field_layout(_fields)
+
+def decode(byte_code):
+    """Декодирование байт-кода в плоскую таблицу (A, B, C, D, E) по 5 полей на команду.
+
+    С NumPy поля всех команд извлекаются одной операцией: сдвиги и маски выбираются из _LAYOUTS
+    по коду операции каждой команды; без NumPy - циклом по командам.
+    """
+    tail = len(byte_code) % INSTRUCTION_SIZE
+    if tail:  # Неполная последняя команда дополняется нулями
+        byte_code = bytes(byte_code) + bytes(INSTRUCTION_SIZE - tail)
+    if np is not None:
+        return _decode_vector(byte_code)
 
-    i = 0
-    while i < len(byte_code):
-        command = byte_code[i] & 0x0F  # Биты 0-3 для команды
-        
+    table = array("I")
+    extend = table.extend
+    layouts = _LAYOUTS
+    for word, _ in WORD.iter_unpack(byte_code):  # Все поля лежат в младших 32 битах
+        command = word & 0x0F  # Биты 0-3 для команды
+        b, mask_b, c, mask_c, d, mask_d, e, mask_e = layouts[command]
+        extend((command, (word >> b) & mask_b, (word >> c) & mask_c, (word >> d) & mask_d, (word >> e) & mask_e))
+    return table
+
+def _decode_vector(byte_code):
+    raw = np.frombuffer(byte_code, dtype=np.uint8).reshape(-1, INSTRUCTION_SIZE)
+    words = np.ascontiguousarray(raw[:, :4]).view("<u4")  # Столбец слов: все поля в младших 32 битах
+    commands = words[:, 0] & 0x0F
+    layouts = np.array(_LAYOUTS, dtype=np.uint32)
+    rows = np.empty((len(words), 5), dtype=np.uint32)
+    rows[:, 0] = commands
+    rows[:, 1:] = (words >> layouts[commands, 0::2]) & layouts[commands, 1::2]  # Сдвиги и маски по коду операции
+    table = array("I")
+    table.frombytes(rows.astype(f"=u{table.itemsize}", copy=False).tobytes())
+    return table
+
+def execute(table, memory, registers, trace=None):
+    """Выполнение декодированной таблицы команд.
+
+    Сообщения трассировки формируются только если передан список trace.
+    Возвращает (число выполненных команд, число ошибок, признак успешного завершения).
+    """
+    errors = 0
+    steps = 0
+    fields = iter(table)
+    for command, B, C, D, E in zip(fields, fields, fields, fields, fields):
+        steps += 1
         if command == 6:  # load_const (Загрузка константы)
-            B = (int.from_bytes(byte_code[i:i+6], "little") >> 4) & 0x1F  # Индекс регистра
-            C = (int.from_bytes(byte_code[i:i+6], "little") >> 10) & 0xFFFFF  # Константа
             if 0 <= B < len(registers):  # Проверка на допустимый индекс регистра
                 registers[B] = C
-                print(f"Загрузка константы: регистр[{B}] = {C}")
+                if trace is not None:
+                    trace.append(f"Загрузка константы: регистр[{B}] = {C}")
             else:
-                print(f"Ошибка: Неверный индекс регистра {B}")
+                errors += 1
+                if trace is not None:
+                    trace.append(f"Ошибка: Неверный индекс регистра {B}")
         elif command == 10:  # read_mem (Чтение значения из памяти)
-            B = (int.from_bytes(byte_code[i:i+6], "little") >> 4) & 0x1F  # Регистр для хранения
-            C = (int.from_bytes(byte_code[i:i+6], "little") >> 10) & 0xFFFFF  # Адрес памяти
             if 0 <= B < len(registers) and 0 <= C < len(memory):  # Проверка на допустимые индексы
                 registers[B] = memory[C]
-                print(f"Чтение из памяти: регистр[{B}] = память[{C}]")
+                if trace is not None:
+                    trace.append(f"Чтение из памяти: регистр[{B}] = память[{C}]")
             else:
-                print(f"Ошибка: Неверный индекс {B} или {C} (регистр или память)")
+                errors += 1
+                if trace is not None:
+                    trace.append(f"Ошибка: Неверный индекс {B} или {C} (регистр или память)")
         elif command == 12:  # write_mem (Запись значения в память)
-            B = (int.from_bytes(byte_code[i:i+6], "little") >> 4) & 0x3F  # Смещение
-            C = (int.from_bytes(byte_code[i:i+6], "little") >> 11) & 0x1F  # Адрес памяти
-            D = (int.from_bytes(byte_code[i:i+6], "little") >> 17) & 0x1F  # Регистр для записи
             if 0 <= C + B < len(memory) and 0 <= D < len(registers):  # Проверка индексов
                 memory[C + B] = registers[D]
-                print(f"Запись в память: память[{C+B}] = регистр[{D}]")
+                if trace is not None:
+                    trace.append(f"Запись в память: память[{C+B}] = регистр[{D}]")
             else:
-                print(f"Ошибка: Неверный адрес памяти или индекс регистра. C={C}, B={B}, D={D}")
+                errors += 1
+                if trace is not None:
+                    trace.append(f"Ошибка: Неверный адрес памяти или индекс регистра. C={C}, B={B}, D={D}")
         elif command == 14:  # mod_mem (Остаток от деления)
-            B = (int.from_bytes(byte_code[i:i+6], "little") >> 4) & 0x3F  # Смещение
-            C = (int.from_bytes(byte_code[i:i+6], "little") >> 11) & 0x1F  # Адрес памяти
-            D = (int.from_bytes(byte_code[i:i+6], "little") >> 17) & 0x1F  # Регистр D
-            E = (int.from_bytes(byte_code[i:i+6], "little") >> 23) & 0x1F  # Регистр E
             if 0 <= C + B < len(memory) and 0 <= D < len(registers) and 0 <= E < len(registers):
                 if registers[E] != 0:
                     memory[C + B] = memory[registers[D]] % registers[E]
-                    print(f"Остаток: память[{C+B}] = память[{registers[D]}] % регистр[{E}]")
+                    if trace is not None:
+                        trace.append(f"Остаток: память[{C+B}] = память[{registers[D]}] % регистр[{E}]")
                 else:
-                    print(f"Ошибка: деление на ноль!")
-                    return False
+                    if trace is not None:
+                        trace.append(f"Ошибка: деление на ноль!")
+                    return steps, errors + 1, False
             else:
-                print(f"Ошибка: Неверные индексы для модификации памяти или регистров. C={C}, B={B}, D={D}, E={E}")
-        i += 6  # Переход к следующей команде (каждая команда занимает 6 байт)
+                errors += 1
+                if trace is not None:
+                    trace.append(f"Ошибка: Неверные индексы для модификации памяти или регистров. C={C}, B={B}, D={D}, E={E}")
+    return steps, errors, True
+
+class ProgramHalted(Exception):
+    """Остановка программы замыканий (деление на ноль)."""
+
+def _load_const(registers, B, C, trace):
+    if trace is None:
+        return partial(registers.__setitem__, B, C)
+    message = f"Загрузка константы: регистр[{B}] = {C}"
+    def run():
+        registers[B] = C
+        trace.append(message)
+    return run
+
+def _read_mem(memory, registers, B, C, trace):
+    if trace is None:
+        def run():
+            registers[B] = memory[C]
+        return run
+    message = f"Чтение из памяти: регистр[{B}] = память[{C}]"
+    def run():
+        registers[B] = memory[C]
+        trace.append(message)
+    return run
+
+def _write_mem(memory, registers, address, D, trace):
+    if trace is None:
+        def run():
+            memory[address] = registers[D]
+        return run
+    message = f"Запись в память: память[{address}] = регистр[{D}]"
+    def run():
+        memory[address] = registers[D]
+        trace.append(message)
+    return run
+
+def _mod_mem(memory, registers, address, D, E, trace):
+    def run():
+        divisor = registers[E]
+        if divisor == 0:
+            if trace is not None:
+                trace.append("Ошибка: деление на ноль!")
+            raise ProgramHalted()
+        memory[address] = memory[registers[D]] % divisor
+        if trace is not None:
+            trace.append(f"Остаток: память[{address}] = память[{registers[D]}] % регистр[{E}]")
+    return run
+
+def _skip():
+    pass
+
+def _error(message, trace):
+    return partial(trace.append, message) if trace is not None else _skip
+
+def _compile_instruction(command, B, C, D, E, memory, registers, trace):
+    """Замыкание для одной команды: (функция, признак ошибки).
+
+    Проверки индексов зависят только от полей команды и выполняются здесь, а не при запуске.
+    Для ошибочной команды функция только пишет сообщение в трассировку.
+    """
+    if command == 6:  # load_const
+        if 0 <= B < len(registers):
+            return _load_const(registers, B, C, trace), False
+        return _error(f"Ошибка: Неверный индекс регистра {B}", trace), True
+    if command == 10:  # read_mem
+        if 0 <= B < len(registers) and 0 <= C < len(memory):
+            return _read_mem(memory, registers, B, C, trace), False
+        return _error(f"Ошибка: Неверный индекс {B} или {C} (регистр или память)", trace), True
+    if command == 12:  # write_mem
+        if 0 <= C + B < len(memory) and 0 <= D < len(registers):
+            return _write_mem(memory, registers, C + B, D, trace), False
+        return _error(f"Ошибка: Неверный адрес памяти или индекс регистра. C={C}, B={B}, D={D}", trace), True
+    if command == 14:  # mod_mem
+        if 0 <= C + B < len(memory) and 0 <= D < len(registers) and 0 <= E < len(registers):
+            return _mod_mem(memory, registers, C + B, D, E, trace), False
+        return _error(f"Ошибка: Неверные индексы для модификации памяти или регистров. C={C}, B={B}, D={D}, E={E}", trace), True
+    return _skip, False  # Неизвестная команда пропускается
+
+def compile_closures(table, memory, registers, trace=None):
+    """Трансляция таблицы команд в список замыканий с заранее связанными операндами.
+
+    Каждой команде соответствует ровно одна функция в списке. Замыкания привязаны к спискам
+    memory и registers, поэтому программу можно выполнять повторно, сбросив их содержимое
+    на месте. Замыкание создается один раз для каждой различной команды; с NumPy различные
+    команды и позиции каждой из них находятся одной сортировкой, без цикла по всей таблице.
+    Возвращает (список замыканий, номера шагов с ошибками).
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()  # Сборщик мусора сильно замедляет создание сотен тысяч объектов
+    try:
+        if np is not None and len(table) >= 5:
+            compiled = _compile_unique(table, memory, registers, trace)
+            if compiled is not None:
+                return compiled
+        program = []
+        append = program.append
+        error_steps = []
+        cache = {}
+        fields = iter(table)
+        for step, row in enumerate(zip(fields, fields, fields, fields, fields), 1):
+            entry = cache.get(row)
+            if entry is None:
+                entry = cache[row] = _compile_instruction(*row, memory, registers, trace)
+            append(entry[0])
+            if entry[1]:
+                error_steps.append(step)
+        return program, error_steps
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _compile_unique(table, memory, registers, trace):
+    """compile_closures() через np.unique по строкам таблицы, упакованным в одно 64-битное число.
+
+    Возвращает None, если поля не помещаются в 64 бита (таблица собрана не декодером).
+    """
+    rows = np.frombuffer(table, dtype=f"=u{table.itemsize}").reshape(-1, 5).astype(np.uint64)
+    widths = [int(value).bit_length() for value in rows.max(axis=0)]
+    if sum(widths) > 64:
+        return None
+    shifts = np.cumsum([0] + widths[:-1], dtype=np.uint64)
+    keys = np.bitwise_or.reduce(rows << shifts, axis=1)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    fields = (unique[:, None] >> shifts) & ((np.uint64(1) << np.array(widths, dtype=np.uint64)) - np.uint64(1))
+    entries = [_compile_instruction(*row, memory, registers, trace) for row in fields.tolist()]
+    functions = [function for function, _ in entries]
+    failed = np.array([failed for _, failed in entries], dtype=bool)
+    program = list(map(functions.__getitem__, inverse.tolist()))
+    return program, (np.flatnonzero(failed[inverse]) + 1).tolist()
+
+def run_closures(program):
+    """Выполнение списка замыканий. Возвращает индекс остановившей программу функции или None."""
+    position = iter(program)
+    try:
+        for run in position:
+            run()
+    except ProgramHalted:
+        return len(program) - length_hint(position) - 1
+    return None
+
+def execute_closures(table, memory, registers, trace=None):
+    """Выполнение программы, оттранслированной в замыкания. Результат как у execute()."""
+    program, error_steps = compile_closures(table, memory, registers, trace)
+    halted_at = run_closures(program)
+    if halted_at is None:
+        return len(table) // 5, len(error_steps), True
+    steps = halted_at + 1  # Номер шага совпадает с позицией функции в списке
+    return steps, bisect_right(error_steps, steps) + 1, False
+
+def _last_writes(targets):
+    """Индексы последней записи в каждый адрес части (при повторах побеждает последняя запись)."""
+    _, first_from_end = np.unique(targets[::-1], return_index=True)
+    return len(targets) - 1 - first_from_end
+
+def _plan_run(command, rows, memory, registers):
+    """Разбиение серии одинаковых команд на части (начало, конец, векторно ли).
 
-    # Запись значений в файл-результат
+    Ошибочные команды и деление на ноль выполняются скалярно по одной. Серия mod_mem
+    дополнительно режется перед командой, читающей ячейку, записанную ранее в той же части.
+    Регистры внутри серии mod_mem не меняются, поэтому адреса чтения известны заранее.
+    """
+    B, C, D, E = (rows[:, k].astype(np.int64) for k in range(1, 5))
+    conflict = None
+    if command == 6:  # load_const
+        bad = B >= len(registers)
+    elif command == 10:  # read_mem
+        bad = (B >= len(registers)) | (C >= len(memory))
+    elif command == 12:  # write_mem
+        bad = (C + B >= len(memory)) | (D >= len(registers))
+    else:  # mod_mem
+        address = C + B
+        bad = (address >= len(memory)) | (D >= len(registers)) | (E >= len(registers))
+        source = registers[np.where(bad, 0, D)]
+        bad |= (registers[np.where(bad, 0, E)] == 0) | (source < 0) | (source >= len(memory))
+        # Последняя предыдущая запись в ячейку source[i]: поиск по ключам адрес * n + позиция
+        n = len(rows)
+        positions = np.arange(n)
+        written = np.sort(np.where(bad, len(memory), address) * n + positions)
+        found = np.searchsorted(written, source * n + positions) - 1
+        key = written[np.maximum(found, 0)]
+        conflict = np.where((found >= 0) & (key // n == source) & ~bad, key % n, -1)
+
+    candidates = bad if conflict is None else bad | (conflict >= 0)
+    indices = np.flatnonzero(candidates)
+    bad_at = bad[indices].tolist()  # Списки: обращение к элементам массива NumPy в цикле медленное
+    conflict_at = conflict[indices].tolist() if conflict is not None else bad_at
+    cuts = []
+    piece_start = 0
+    for i, failed, previous in zip(indices.tolist(), bad_at, conflict_at):
+        if failed:
+            cuts += [i, i + 1]
+            piece_start = i + 1
+        elif previous >= piece_start:
+            cuts.append(i)
+            piece_start = i
+    pieces = []
+    for piece_start, piece_end in zip([0] + cuts, cuts + [len(rows)]):
+        if piece_start < piece_end:
+            vector = piece_end - piece_start >= VECTOR_MIN_RUN  # Ошибочные команды - части длины 1
+            pieces.append((piece_start, piece_end, vector))
+    if 2 * sum(end - start for start, end, vector in pieces if vector) < len(rows):
+        return [(0, len(rows), False)]  # Частые зависимости: короткие векторные части не окупаются
+    return pieces
+
+def _spans(rows, runs, memory, registers):
+    """Части программы (начало, конец, векторно ли) для execute_vector() по сериям runs не короче VECTOR_MIN_RUN.
+
+    Соседние скалярные части объединяются в одну, чтобы execute() вызывался один раз на участок.
+    Длинная серия планируется окнами по VECTOR_WINDOW команд; если окно целиком выполняется
+    скалярно, следующие 1, 2, 4, ... окон этой серии выполняются скалярно без планирования.
+    Генератор ленивый: окно планируется после выполнения выданных ранее частей, поэтому план
+    mod_mem видит текущие значения регистров.
+    """
+    pending = 0  # Начало ещё не выданной скалярной части
+    for start, end in runs:
+        command = int(rows[start, 0])
+        if command not in (6, 10, 12, 14):
+            continue
+        skip = backoff = 0
+        for window in range(start, end, VECTOR_WINDOW):
+            if skip:
+                skip -= 1
+                continue
+            if pending < window:
+                yield pending, window, False
+                pending = window
+            pieces = _plan_run(command, rows[window:min(window + VECTOR_WINDOW, end)], memory, registers)
+            if len(pieces) == 1 and not pieces[0][2]:
+                backoff = 2 * backoff or 1
+                skip = backoff
+                continue
+            backoff = 0
+            for piece_start, piece_end, vector in pieces:
+                if vector:
+                    if pending < window + piece_start:
+                        yield pending, window + piece_start, False
+                    yield window + piece_start, window + piece_end, True
+                    pending = window + piece_end
+    if pending < len(rows):
+        yield pending, len(rows), False
+
+def _vector_piece(command, rows, memory, registers):
+    """Выполнение части серии без ошибок и зависимостей одной операцией gather/scatter."""
+    B, C, D, E = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    if command == 6:  # load_const
+        last = _last_writes(B)
+        registers[B[last]] = C[last]
+    elif command == 10:  # read_mem
+        last = _last_writes(B)
+        registers[B[last]] = memory[C[last]]
+    elif command == 12:  # write_mem
+        address = C + B
+        last = _last_writes(address)
+        memory[address[last]] = registers[D[last]]
+    else:  # mod_mem
+        address = C + B
+        last = _last_writes(address)
+        memory[address[last]] = memory[registers[D[last]]] % registers[E[last]]
+
+def _int64_buffer(values):
+    """Буфер int64 для скалярных частей и массив NumPy над ним без копирования (список копируется).
+
+    Скалярные части выполняются над буфером: индексирование массива NumPy возвращает np.int64
+    и в цикле execute() в несколько раз медленнее, чем у array/memoryview.
+    """
+    if isinstance(values, list):
+        values = array("q", values)
+    return values, np.frombuffer(values, dtype=np.int64)
+
+def execute_vector(table, memory, registers, trace=None):
+    """Выполнение с векторизацией серий одинаковых команд через NumPy.
+
+    Серии не короче VECTOR_MIN_RUN делятся на независимые части (см. _plan_run и _spans), которые
+    выполняются одной операцией над массивами; остальное выполняется скалярно через execute()
+    участками между векторными частями.
+    Без NumPy, в режиме трассировки или если длинные серии покрывают меньше половины программы,
+    вся программа выполняется через execute(). Результат как у execute().
+    """
+    if np is None or trace is not None or not table:
+        return execute(table, memory, registers, trace)
+    rows = np.frombuffer(table, dtype=f"u{table.itemsize}").reshape(-1, 5)
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(rows[:, 0])) + 1, [len(rows)]))
+    long_runs = np.flatnonzero(np.diff(bounds) >= VECTOR_MIN_RUN)
+    starts, ends = bounds[long_runs], bounds[long_runs + 1]
+    if 2 * int((ends - starts).sum()) < len(rows):
+        return execute(table, memory, registers, trace)
+    runs = zip(starts.tolist(), ends.tolist())  # Только длинные серии, остальное выполняется скалярно
+
+    memory_buffer, memory_array = _int64_buffer(memory)
+    registers_buffer, registers_array = _int64_buffer(registers)
+    steps = errors = 0
+    ok = True
+    try:
+        for start, end, vector in _spans(rows, runs, memory_array, registers_array):
+            if vector:
+                _vector_piece(int(rows[start, 0]), rows[start:end], memory_array, registers_array)
+                steps += end - start
+                continue
+            piece_steps, piece_errors, ok = execute(table[5 * start:5 * end], memory_buffer, registers_buffer)
+            steps += piece_steps
+            errors += piece_errors
+            if not ok:
+                break
+    finally:
+        if isinstance(memory, list):  # Списки копируются, типизированные буферы изменяются на месте
+            memory[:] = memory_buffer.tolist()
+        if isinstance(registers, list):
+            registers[:] = registers_buffer.tolist()
+    return steps, errors, ok
+
+class TraceLog:
+    """Трассировка выполнения с записью пакетами по TRACE_BATCH сообщений.
+
+    Сообщения пишутся в CSV-файл trace_path (Step,Message) или, если путь не задан, в стандартный
+    вывод. Исполнители вызывают только append (и dump_memory - extend), как у списка, поэтому
+    в памяти находится не больше одного пакета, а уже записанная часть сохраняется, даже если
+    выполнение прервано исключением.
+    """
+    def __init__(self, trace_path=None, batch_size=TRACE_BATCH):
+        self.batch_size = batch_size
+        self.pending = []
+        self.step = 0  # Номер первого сообщения в pending
+        if trace_path is None:
+            self.file = None
+        else:
+            self.file = open(trace_path, "w", encoding="utf-8", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(("Step", "Message"))
+
+    def append(self, message):
+        pending = self.pending
+        pending.append(message)
+        if len(pending) >= self.batch_size:
+            self.flush()
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            sys.stdout.write("\n".join(self.pending) + "\n")
+        else:
+            self.writer.writerows(zip(range(self.step, self.step + len(self.pending)), self.pending))
+        self.step += len(self.pending)
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+        else:
+            sys.stdout.flush()
+
+def create_memory(size, memory_path=None):
+    """Память ВМ из size ячеек int64: типизированный массив или файл memory_path, отображённый в память."""
+    if size < 1:
+        raise ValueError(f"Неверный размер памяти: {size}")
+    if memory_path is None:
+        return array("q", bytes(8 * size))
+    with open(memory_path, "w+b") as memory_file:
+        memory_file.truncate(8 * size)
+        mapping = mmap.mmap(memory_file.fileno(), 8 * size)
+    return memoryview(mapping).cast("q")
+
+def dump_memory(memory, memory_range, result_path, trace=None):
+    """Запись диапазона памяти в CSV блоками по DUMP_CHUNK адресов.
+
+    Возвращает число адресов диапазона, выходящих за пределы памяти.
+    """
+    first, last = memory_range
+    low, high = max(first, 0), min(last, len(memory) - 1)
+    below = range(first, min(last + 1, 0))
+    above = range(max(first, len(memory)), last + 1)
+    if trace is not None:
+        trace.extend(f"Ошибка: Адрес {address} выходит за пределы памяти." for address in below)
     with open(result_path, "w", encoding="utf-8") as result_file:
         result_file.write("Address,Value\n")
-        for address in range(memory_range[0], memory_range[1] + 1):
-            if 0 <= address < len(memory):  # Проверка диапазона адресов
-                result_file.write(f"{address},{memory[address]}\n")
-                print(f"Память[{address}] = {memory[address]}")
-            else:
-                print(f"Ошибка: Адрес {address} выходит за пределы памяти.")
+        for start in range(low, high + 1, DUMP_CHUNK):
+            addresses = range(start, min(start + DUMP_CHUNK, high + 1))
+            values = memory[addresses.start:addresses.stop]
+            result_file.write("".join(map("{},{}\n".format, addresses, values)))
+            if trace is not None:
+                trace.extend(map("Память[{}] = {}".format, addresses, values))
+    if trace is not None:
+        trace.extend(f"Ошибка: Адрес {address} выходит за пределы памяти." for address in above)
+    return len(below) + len(above)
+
+def interpreter(binary_path, result_path, memory_range, verbosity="trace", trace_path=None, engine="bytecode",
+                memory_size=MEMORY_SIZE, memory_path=None):
+    """Запуск программы из бинарного файла.
+
+    verbosity: "silent" - без вывода, "summary" - одна итоговая строка,
+    "trace" - полная трассировка (в trace_path, если указан, иначе в стандартный вывод).
+    engine: "bytecode" - цикл по таблице команд,
+    "vector" - векторное выполнение серий одинаковых команд (NumPy).
+    memory_size: число ячеек памяти; memory_path: файл, в который отображается память (иначе массив в ОЗУ).
+    """
+    if verbosity not in VERBOSITY_LEVELS:
+        raise ValueError(f"Неизвестный уровень вывода: {verbosity}")
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный исполнитель: {engine}")
+    # Инициализация памяти и регистров
+    memory = create_memory(memory_size, memory_path)
+    registers = array("q", bytes(8 * REGISTER_COUNT))
+
+    with open(binary_path, "rb") as binary_file:
+        table = decode(binary_file.read())
+
+    trace = TraceLog(trace_path) if verbosity == "trace" else None
+    try:
+        steps, errors, ok = ENGINES[engine](table, memory, registers, trace)
+        if ok:
+            errors += dump_memory(memory, memory_range, result_path, trace)
+    finally:
+        if trace is not None:
+            trace.close()
+
+    if verbosity == "summary":
+        status = "завершено" if ok else "остановлено (деление на ноль)"
+        print(f"Выполнено команд: {steps}, ошибок: {errors}, {status}")
+    if not ok:
+        return False
+
+# Исполнители для --engine. execute_closures не входит: трансляция в замыкания дороже, чем один
+# проход execute, и окупается только при повторном выполнении программы (compile_closures + run_closures)
+ENGINES = {"bytecode": execute, "vector": execute_vector}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Interpreting the bytes like instructions (from binary file) to the csv-table.")
@@ -73,5 +560,11 @@ if __name__ == "__main__":
     parser.add_argument("result_path", help="Path to the result file (csv)")
     parser.add_argument("first_index", help="The first index of the displayed memory")
     parser.add_argument("last_index", help="The last index of the displayed memory")
+    parser.add_argument("--verbosity", choices=VERBOSITY_LEVELS, default="trace", help="Output level: silent, summary or full trace")
+    parser.add_argument("--trace", dest="trace_path", help="Path to the trace file (csv), written instead of the terminal output")
+    parser.add_argument("--engine", choices=ENGINES, default="bytecode", help="Execution engine: bytecode loop or NumPy vector runs")
+    parser.add_argument("--memory-size", type=int, default=MEMORY_SIZE, help="Number of memory cells (read_mem addresses up to 2^20)")
+    parser.add_argument("--memory-file", dest="memory_path", help="Map the VM memory to this file instead of RAM")
     args = parser.parse_args()
-    interpreter(args.binary_path, args.result_path, (int(args.first_index), int(args.last_index)))
+    interpreter(args.binary_path, args.result_path, (int(args.first_index), int(args.last_index)),
+                args.verbosity, args.trace_path, args.engine, args.memory_size, args.memory_path)
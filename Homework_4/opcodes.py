@@ -0,0 +1,17 @@
+# Общая таблица команд УВМ для ассемблера и интерпретатора
+import struct
+
+INSTRUCTION_SIZE = 6  # Каждая команда занимает 6 байт
+WORD = struct.Struct("<IH")  # Команда как младшие 32 бита и старшие 16 бит (little-endian)
+
+# Имя команды -> (код операции A в битах 0-3, поля B, C, D, E в виде (смещение, ширина в битах))
+OPCODES = {
+    # "Загрузка константы" - B=Регистр, C=Константа
+    "load_const": (6, ((4, 5), (10, 20))),
+    # "Чтение значения из памяти" - B=Регистр, C=Адрес в памяти
+    "read_mem": (10, ((4, 5), (10, 20))),
+    # "Запись значения в память" - B=Смещение, C=Адрес, D=Регистр
+    "write_mem": (12, ((4, 6), (11, 5), (17, 5))),
+    # "Бинарная операция: взятие остатка" - B=Смещение, C=Адрес, D=Регистр, E=Регистр
+    "mod_mem": (14, ((4, 6), (11, 5), (17, 5), (23, 5))),
+}
@@ -1,4 +1,6 @@
-from assembler import assembler
+import os
+import tempfile
+from assembler import assemble_parallel, assemble_to_file, assembler, encode_chunks, read_binary_log
 
 def test_load_const():
     instructions = [
@@ -6,7 +8,7 @@ def test_load_const():
     ]
     expected_bytes = bytes([0x86, 0x8E, 0x0C, 0x00, 0x00, 0x00])
     result = assembler(instructions)
-    assert result == list(expected_bytes), f"Test load_const failed. Expected {expected_bytes}, got {bytes(result)}"
+    assert result == expected_bytes, f"Test load_const failed. Expected {expected_bytes}, got {bytes(result)}"
     print("Test load_const passed.")
 
 def test_read_mem():
@@ -15,7 +17,7 @@ def test_read_mem():
     ]
     expected_bytes = bytes([0xCA, 0x99, 0x0E, 0x00, 0x00, 0x00])
     result = assembler(instructions)
-    assert result == list(expected_bytes), f"Test read_mem failed. Expected {expected_bytes}, got {bytes(result)}"
+    assert result == expected_bytes, f"Test read_mem failed. Expected {expected_bytes}, got {bytes(result)}"
     print("Test read_mem passed.")
 
 def test_write_mem():
@@ -24,7 +26,7 @@ def test_write_mem():
     ]
     expected_bytes = bytes([0xEC, 0xFA, 0x78, 0x00, 0x00, 0x00])
     result = assembler(instructions)
-    assert result == list(expected_bytes), f"Test write_mem failed. Expected {expected_bytes}, got {bytes(result)}"
+    assert result == expected_bytes, f"Test write_mem failed. Expected {expected_bytes}, got {bytes(result)}"
     print("Test write_mem passed.")
 
 def test_mod_mem():
@@ -33,12 +35,71 @@ def test_mod_mem():
     ]
     expected_bytes = bytes([0xCE, 0x55, 0xF3, 0x10, 0x00, 0x00])
     result = assembler(instructions)
-    assert result == list(expected_bytes), f"Test mod_mem failed. Expected {expected_bytes}, got {bytes(result)}"
+    assert result == expected_bytes, f"Test mod_mem failed. Expected {expected_bytes}, got {bytes(result)}"
     print("Test mod_mem passed.")
 
+def test_log_all_operands():
+    instructions = [
+        ("load_const", 8, 803),
+        ("write_mem", 10, 8, 8),
+        ("mod_mem", 8, 8, 10, 7),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        text_log = os.path.join(tmp, "log.csv")
+        binary_log = os.path.join(tmp, "log.bin")
+        assembler(instructions, text_log)
+        assembler(instructions, binary_log, "binary")
+        with open(text_log, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        records = read_binary_log(binary_log)
+    expected_lines = ["A=6,B=8,C=803", "A=12,B=10,C=8,D=8", "A=14,B=8,C=8,D=10,E=7"]
+    assert lines == expected_lines, f"Test log_all_operands failed. Expected {expected_lines}, got {lines}"
+    expected_records = [(6, 8, 803, 0, 0), (12, 10, 8, 8, 0), (14, 8, 8, 10, 7)]
+    assert records == expected_records, f"Test log_all_operands failed. Expected {expected_records}, got {records}"
+    print("Test log_all_operands passed.")
+
+def test_streaming():
+    instructions = [("load_const", i % 32, i) for i in range(10)] + [("mod_mem", 1, 2, 3, 4)]
+    chunks = list(encode_chunks(iter(instructions), chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [24, 24, 18], f"Test streaming failed. Got {[len(chunk) for chunk in chunks]}"
+    assert b"".join(chunks) == assembler(instructions), "Test streaming failed: chunks differ from assembler()"
+    assert assembler(instruction for instruction in instructions) == assembler(instructions), "Test streaming failed: generator input"
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "program.csv")
+        binary_path = os.path.join(tmp, "program.bin")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("".join(",".join(map(str, instruction)) + "\n" for instruction in instructions))
+        count = assemble_to_file(csv_path, binary_path, chunk_size=3)
+        with open(binary_path, "rb") as f:
+            binary = f.read()
+    assert count == 11 and binary == assembler(instructions), "Test streaming failed: file differs from assembler()"
+    print("Test streaming passed.")
+
+def test_parallel():
+    lines = ["operation,B,C"] + [f"load_const,{i % 32},{i}" if i % 3 else f"mod_mem,{i % 64},1,2,3" for i in range(500)]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "program.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        outputs = []
+        for jobs in (1, 3):
+            binary_path = os.path.join(tmp, f"program_{jobs}.bin")
+            log_path = os.path.join(tmp, f"log_{jobs}.csv")
+            if jobs == 1:
+                count = assemble_to_file(csv_path, binary_path, log_path)
+            else:
+                count = assemble_parallel(csv_path, binary_path, log_path, jobs=jobs, shard_size=1000)
+            with open(binary_path, "rb") as f, open(log_path, encoding="utf-8") as log:
+                outputs.append((count, f.read(), log.read()))
+    assert outputs[0][0] == 500 and outputs[0] == outputs[1], "Test parallel failed: parallel output differs from serial"
+    print("Test parallel passed.")
+
 if __name__ == "__main__":
     test_load_const()
     test_read_mem()
     test_write_mem()
     test_mod_mem()
+    test_log_all_operands()
+    test_streaming()
+    test_parallel()
     print("All tests passed successfully!")
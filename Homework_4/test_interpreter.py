@@ -0,0 +1,182 @@
+import os
+import random
+import tempfile
+import interpreter as interpreter_module
+from assembler import assembler, save_to_bin
+from interpreter import ENGINES, compile_closures, decode, execute, execute_closures, execute_vector, interpreter
+
+def test_decode():
+    instructions = [
+        ("load_const", 8, 803),
+        ("read_mem", 28, 934),
+        ("write_mem", 46, 31, 20),
+        ("mod_mem", 12, 8, 10, 7),
+    ]
+    table = decode(bytes(assembler(instructions)))
+    expected = [6, 8, 803, 0, 0, 10, 28, 934, 0, 0, 12, 46, 31, 20, 0, 14, 12, 8, 10, 7]
+    assert list(table) == expected, f"Test decode failed. Expected {expected}, got {list(table)}"
+    print("Test decode passed.")
+
+def test_decode_without_numpy():
+    rng = random.Random(3)
+    byte_code = bytes(rng.randrange(256) for _ in range(6 * 1000 + 3))  # Все коды операций и неполная команда
+    table = decode(byte_code)
+    saved, interpreter_module.np = interpreter_module.np, None
+    try:
+        expected = decode(byte_code)
+    finally:
+        interpreter_module.np = saved
+    assert table == expected and len(table) == 5 * 1001, "Test decode_without_numpy failed: decoders differ"
+    print("Test decode_without_numpy passed.")
+
+def test_trace_file():
+    instructions = [
+        ("load_const", 0, 17),
+        ("load_const", 1, 3),
+        ("load_const", 2, 5),
+        ("write_mem", 3, 0, 0),
+        ("mod_mem", 0, 4, 1, 2),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "program.bin")
+        result_path = os.path.join(tmp, "result.csv")
+        trace_path = os.path.join(tmp, "trace.csv")
+        save_to_bin(assembler(instructions), binary_path)
+        interpreter(binary_path, result_path, (3, 4), "trace", trace_path)
+        with open(result_path, encoding="utf-8") as f:
+            result = f.read()
+        with open(trace_path, encoding="utf-8") as f:
+            trace = f.read().splitlines()
+    assert result == "Address,Value\n3,17\n4,2\n", f"Test trace_file failed. Got {result!r}"
+    assert trace[0] == "Step,Message" and len(trace) == 8, f"Test trace_file failed. Got {trace}"
+    print("Test trace_file passed.")
+
+def test_trace_kept_on_error():
+    instructions = [
+        ("load_const", 1, 1000),  # Адрес вне памяти для mod_mem
+        ("load_const", 2, 3),
+        ("mod_mem", 0, 0, 1, 2),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "program.bin")
+        trace_path = os.path.join(tmp, "trace.csv")
+        save_to_bin(assembler(instructions), binary_path)
+        try:
+            interpreter(binary_path, os.path.join(tmp, "result.csv"), (0, 1), "trace", trace_path)
+            assert False, "Test trace_kept_on_error failed: IndexError expected"
+        except IndexError:
+            pass
+        with open(trace_path, encoding="utf-8") as f:
+            trace = f.read().splitlines()
+    assert trace == ["Step,Message", "0,Загрузка константы: регистр[1] = 1000",
+                     "1,Загрузка константы: регистр[2] = 3"], f"Test trace_kept_on_error failed. Got {trace}"
+    print("Test trace_kept_on_error passed.")
+
+def test_engines_match():
+    instructions = [
+        ("load_const", 0, 17),
+        ("load_const", 1, 3),
+        ("read_mem", 5, 100),  # Адрес вне памяти
+        ("load_const", 2, 5),
+        ("write_mem", 3, 0, 0),
+        ("read_mem", 4, 3),
+        ("mod_mem", 0, 4, 1, 2),
+        ("mod_mem", 0, 5, 1, 6),  # Деление на ноль
+    ]
+    table = decode(bytes(assembler(instructions)))
+    results = []
+    for engine in (*ENGINES.values(), execute_closures):
+        memory, registers, trace = [0] * 64, [0] * 32, []
+        status = engine(table, memory, registers, trace)
+        results.append((status, memory, registers, trace))
+    assert results[0][0] == (8, 2, False), f"Test engines_match failed. Got {results[0][0]}"
+    assert all(result == results[0] for result in results), "Test engines_match failed: engines differ"
+    print("Test engines_match passed.")
+
+def test_closures_without_numpy():
+    rng = random.Random(5)
+    table = decode(bytes(rng.randrange(256) for _ in range(6 * 2000)))  # Много повторов и ошибочных команд
+    results = []
+    for numpy in (interpreter_module.np, None):
+        saved, interpreter_module.np = interpreter_module.np, numpy
+        try:
+            memory, registers, trace = [0] * 64, [0] * 32, []
+            program, error_steps = compile_closures(table, memory, registers, trace)
+            status = execute_closures(table, memory, registers, trace)
+        finally:
+            interpreter_module.np = saved
+        results.append((len(program), error_steps, status, memory, registers, trace))
+    expected_memory, expected_registers, expected_trace = [0] * 64, [0] * 32, []
+    expected = execute(table, expected_memory, expected_registers, expected_trace)
+    assert results[0] == results[1], "Test closures_without_numpy failed: translations differ"
+    assert results[0][2:] == (expected, expected_memory, expected_registers, expected_trace), \
+        "Test closures_without_numpy failed: result differs from execute"
+    print("Test closures_without_numpy passed.")
+
+def test_vector_runs():
+    instructions = [("load_const", i, i * 7 % 40 + 1) for i in range(32)]
+    # Серия mod_mem, в которой часть команд читает ячейки, записанные ранее в этой же серии
+    instructions += [("mod_mem", i * 5 % 64, 0, i % 32, (i + 3) % 32) for i in range(800)]
+    instructions += [("write_mem", i % 40, 0, i % 32) for i in range(300)]
+    instructions += [("mod_mem", 41 + i % 23, 0, i % 32, (i + 3) % 32) for i in range(300)]  # Без зависимостей
+    table = decode(bytes(assembler(instructions)))
+    results = []
+    for engine in (execute, execute_vector):
+        memory, registers = list(range(64)), [0] * 32
+        status = engine(table, memory, registers)
+        results.append((status, memory, registers))
+    assert results[0] == results[1], "Test vector_runs failed: vector engine differs from bytecode"
+    print("Test vector_runs passed.")
+
+def test_vector_dependent_run():
+    rng = random.Random(7)
+    instructions = [("load_const", i, i) for i in range(31)] + [("load_const", 31, 7)]
+    for _ in range(20000):  # Почти каждая команда читает ячейку, недавно записанную в этой же серии
+        address = rng.randrange(95)
+        instructions.append(("mod_mem", min(address, 63), address - min(address, 63), rng.randrange(31), 31))
+    table = decode(bytes(assembler(instructions)))
+    calls = []
+    def counted(*args):
+        calls.append(len(args[0]) // 5)
+        return execute(*args)
+    saved, interpreter_module.execute = interpreter_module.execute, counted
+    try:
+        memory, registers = [0] * 128, [0] * 32
+        status = execute_vector(table, memory, registers)
+    finally:
+        interpreter_module.execute = saved
+    expected_memory, expected_registers = [0] * 128, [0] * 32
+    assert status == execute(table, expected_memory, expected_registers) == (20032, 0, True)
+    assert (memory, registers) == (expected_memory, expected_registers), "Test vector_dependent_run failed: results differ"
+    assert len(calls) <= 4 and sum(calls) == 20032, f"Test vector_dependent_run failed: {len(calls)} scalar calls"
+    print("Test vector_dependent_run passed.")
+
+def test_memory_file():
+    instructions = [
+        ("load_const", 1, 123),
+        ("write_mem", 5, 3, 1),
+        ("read_mem", 2, 8),
+        ("write_mem", 63, 31, 2),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, "program.bin")
+        result_path = os.path.join(tmp, "result.csv")
+        memory_path = os.path.join(tmp, "memory.bin")
+        save_to_bin(assembler(instructions), binary_path)
+        interpreter(binary_path, result_path, (93, 1 << 20), "silent", memory_size=1 << 20, memory_path=memory_path)
+        with open(result_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        memory_file_size = os.path.getsize(memory_path)
+    assert lines[1:3] == ["93,0", "94,123"] and len(lines) == (1 << 20) - 93 + 1, f"Test memory_file failed. Got {lines[:3]}"
+    assert memory_file_size == 8 << 20, f"Test memory_file failed. Memory file size {memory_file_size}"
+    print("Test memory_file passed.")
+
+if __name__ == "__main__":
+    test_decode()
+    test_decode_without_numpy()
+    test_trace_file()
+    test_trace_kept_on_error()
+    test_engines_match()
+    test_vector_runs()
+    test_memory_file()
+    print("All tests passed successfully!")
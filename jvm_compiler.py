@@ -0,0 +1,142 @@
+import argparse
+import math
+import operator
+import re
+
+# Бинарные операции: знак в Python и функция для свёртки констант (та же семантика, что в jvm.py)
+BINARY_OPS = {
+    "iadd": ("+", operator.add),
+    "isub": ("-", operator.sub),
+    "imul": ("*", operator.mul),
+    "idiv": ("/", operator.truediv),
+    "irem": ("%", operator.mod),
+    "ishl": ("<<", operator.lshift),
+    "ishr": (">>", operator.rshift),
+    "ior": ("|", operator.or_),
+    "iand": ("&", operator.and_),
+}
+MAX_NESTING = 32  # Глубина выражения, после которой значение сохраняется в локальную переменную
+MAX_FOLDED_BITS = 256  # Умножения и сдвиги влево с результатом длиннее не сворачиваются (огромные константы)
+CALL = re.compile(r'^\s*(\w+)\((-?\d*)\)\s*$')  # Строка вида iload(1) или isub()
+
+
+def parse_ops(text):
+    """Последовательность операций из текста в стиле jvm.py: строки iload(1), iconst(2), isub().
+
+    Строки другого вида (args = ..., print(pop()), определения функций) пропускаются; вызов
+    неизвестной операции, например ineg(), - ошибка, как и при выполнении jvm.py.
+    """
+    ops = []
+    for number, line in enumerate(text.splitlines(), 1):
+        match = CALL.match(line)
+        if match:
+            name, operand = match.groups()
+            if name not in BINARY_OPS and name not in ("iconst", "iload"):
+                raise ValueError(f"Строка {number}: неизвестная операция {name}")
+            ops.append((name, int(operand)) if operand else (name,))
+    return ops
+
+
+def stack_depths(ops):
+    """Глубина стека после каждой операции; ошибка при чтении из пустого стека."""
+    depths = []
+    depth = 0
+    for position, (name, *operands) in enumerate(ops):
+        if name in ("iconst", "iload"):
+            if len(operands) != 1:
+                raise ValueError(f"Операция {position} ({name}): ожидается один операнд")
+            if name == "iload" and operands[0] < 0:  # Номер параметра функции, args[-1] не поддерживается
+                raise ValueError(f"Операция {position} (iload): отрицательный номер аргумента {operands[0]}")
+            depth += 1
+        elif name in BINARY_OPS:
+            if operands:
+                raise ValueError(f"Операция {position} ({name}): операнды не допускаются")
+            if depth < 2:
+                raise ValueError(f"Операция {position} ({name}): в стеке {depth} значений, нужно 2")
+            depth -= 1
+        else:
+            raise ValueError(f"Операция {position}: неизвестная операция {name}")
+        depths.append(depth)
+    return depths
+
+
+def _fold(name, lhs, rhs):
+    """Значение операции над константами или None, если свёртку нужно оставить до выполнения."""
+    if isinstance(lhs, int) and isinstance(rhs, int):
+        if name == "imul" and lhs.bit_length() + rhs.bit_length() > MAX_FOLDED_BITS:
+            return None
+        if name == "ishl" and lhs.bit_length() + rhs > MAX_FOLDED_BITS:
+            return None
+    try:
+        return BINARY_OPS[name][1](lhs, rhs)
+    except (ArithmeticError, ValueError, TypeError):  # Деление на ноль, отрицательный сдвиг: ошибка при вызове
+        return None
+
+
+def _operand(value):
+    if isinstance(value, float) and not math.isfinite(value):  # inf и nan не являются литералами Python
+        return f"float('{value!r}')"
+    return value if isinstance(value, str) else repr(value)
+
+
+def generate_source(ops, name="compiled"):
+    """Исходный текст функции name(a0, a1, ...), вычисляющей значение на вершине стека без стека.
+
+    Ячейки стека заменяются выражениями: константы и аргументы подставляются на место, операции над
+    константами вычисляются при компиляции, остальные собираются во вложенное выражение. Выражение
+    глубже MAX_NESTING сохраняется в локальную переменную t<n> (каждая присваивается один раз), поэтому
+    длинные последовательности не упираются в предел вложенности компилятора Python. После
+    выполнения операций в стеке должно остаться ровно одно значение.
+    """
+    depths = stack_depths(ops)
+    if not depths or depths[-1] != 1:
+        raise ValueError(f"После выполнения операций в стеке {depths[-1] if depths else 0} значений, нужно 1")
+    stack = []  # (выражение-строка или константа, глубина выражения)
+    body = []
+    arguments = 0
+    for op, *operands in ops:
+        if op == "iconst":
+            stack.append((operands[0], 0))
+        elif op == "iload":
+            arguments = max(arguments, operands[0] + 1)
+            stack.append((f"a{operands[0]}", 0))
+        else:
+            (rhs, rhs_nesting), (lhs, lhs_nesting) = stack.pop(), stack.pop()
+            if not isinstance(lhs, str) and not isinstance(rhs, str):
+                value = _fold(op, lhs, rhs)
+                if value is not None:
+                    stack.append((value, 0))
+                    continue
+            expression = f"({_operand(lhs)} {BINARY_OPS[op][0]} {_operand(rhs)})"
+            nesting = max(lhs_nesting, rhs_nesting) + 1
+            if nesting >= MAX_NESTING:
+                for slot, (pending, pending_nesting) in enumerate(stack):  # Порядок вычисления как в стеке
+                    if pending_nesting:
+                        stack[slot] = (f"t{len(body)}", 0)
+                        body.append(f"    t{len(body)} = {pending}")
+                register = f"t{len(body)}"
+                body.append(f"    {register} = {expression}")
+                expression, nesting = register, 0
+            stack.append((expression, nesting))
+    body.append(f"    return {_operand(stack[-1][0])}")
+    parameters = ", ".join(f"a{i}" for i in range(arguments))
+    return f"def {name}({parameters}):\n" + "\n".join(body) + "\n"
+
+
+def compile_ops(ops, name="compiled"):
+    """Функция Python, эквивалентная выполнению ops в jvm.py с аргументами args: compiled(*args)."""
+    namespace = {}
+    exec(compile(generate_source(ops, name), f"<{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Компиляция последовательности стековых операций в функцию Python.")
+    parser.add_argument("program", help="Файл с операциями в стиле jvm.py (iload(1), iconst(2), isub() ...)")
+    parser.add_argument("args", nargs="*", type=int, help="Аргументы, доступные через iload")
+    args = parser.parse_args()
+
+    with open(args.program, encoding="utf-8") as f:
+        ops = parse_ops(f.read())
+    print(generate_source(ops))
+    print(compile_ops(ops)(*args.args))
@@ -0,0 +1,105 @@
+import math
+import os
+import random
+
+import pytest
+
+from jvm_compiler import BINARY_OPS, compile_ops, generate_source, parse_ops, stack_depths
+
+
+def interpret(ops, args):
+    """Выполнение ops на стеке, как в jvm.py."""
+    stack = []
+    for name, *operands in ops:
+        if name == "iconst":
+            stack.append(operands[0])
+        elif name == "iload":
+            stack.append(args[operands[0]])
+        else:
+            rhs, lhs = stack.pop(), stack.pop()
+            stack.append(BINARY_OPS[name][1](lhs, rhs))
+    return stack.pop()
+
+
+def outcome(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        return type(e)
+
+
+def same(lhs, rhs):
+    return lhs == rhs or (isinstance(lhs, float) and isinstance(rhs, float) and math.isnan(lhs) and math.isnan(rhs))
+
+
+def test_jvm_program():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "jvm.py"), encoding="utf-8") as f:
+        ops = parse_ops(f.read())
+    assert ops[0] == ("iload", 1) and len(ops) == 9
+    assert compile_ops(ops)(2, 4) == interpret(ops, [2, 4]) == 5
+
+
+def test_random_programs():
+    rng = random.Random(1)
+    names = list(BINARY_OPS)
+    for _ in range(2000):
+        ops, depth = [], 0
+        for _ in range(rng.randrange(1, 120)):
+            if depth >= 2 and rng.random() < 0.5:
+                ops.append((rng.choice(names),))
+                depth -= 1
+            elif rng.random() < 0.5:
+                ops.append(("iconst", rng.randrange(-5, 6)))
+                depth += 1
+            else:
+                ops.append(("iload", rng.randrange(3)))
+                depth += 1
+        ops += [(rng.choice(["iadd", "isub", "ior", "iand"]),)] * (depth - 1)
+        args = [rng.randrange(-100, 100) for _ in range(3)]
+        compiled = compile_ops(ops)
+        expected = outcome(interpret, ops, args)
+        actual = outcome(compiled, *args[:compiled.__code__.co_argcount])
+        assert same(actual, expected), (ops, args, actual, expected)
+
+
+def test_deep_expression():
+    ops = [("iload", 0)] + [("iload", 0), ("iadd",)] * 10000
+    assert compile_ops(ops)(3) == 30003
+    ops = [("iload", 0)] * 5000 + [("iadd",)] * 4999
+    assert compile_ops(ops)(3) == 15000
+
+
+def test_constant_folding():
+    ops = [("iconst", 3), ("iconst", 4), ("imul",), ("iload", 0), ("iadd",)]
+    assert generate_source(ops) == "def compiled(a0):\n    return (12 + a0)\n"
+    ops = [("iconst", 1), ("iconst", 0), ("idiv",)]  # Деление на ноль остаётся до выполнения
+    assert outcome(compile_ops(ops)) is ZeroDivisionError
+
+
+def test_non_finite_constants():
+    huge = [("iconst", 10 ** 300), ("iconst", 1), ("idiv",)]
+    infinity = huge + huge + [("imul",)]
+    for ops, check in ((infinity, math.isinf), (infinity + infinity + [("isub",)], math.isnan),
+                       ([("iload", 0)] + infinity + [("isub",)], math.isinf)):
+        assert "float(" in generate_source(ops)
+        result = compile_ops(ops)(*([1] if ops[0][0] == "iload" else []))
+        assert check(result) and same(result, interpret(ops, [1])), generate_source(ops)
+
+
+def test_invalid_programs():
+    assert stack_depths([("iconst", 1), ("iload", 0), ("iadd",)]) == [1, 2, 1]
+    with pytest.raises(ValueError):
+        stack_depths([("iconst", 1), ("iadd",)])
+    with pytest.raises(ValueError):
+        stack_depths([("iload", -1)])  # jvm.py прочитал бы args[-1]
+    with pytest.raises(ValueError):
+        generate_source([("iconst", 1), ("iconst", 0), ("idiv",), ("iconst", 5)])  # jvm.py: ZeroDivisionError
+    with pytest.raises(ValueError):
+        stack_depths([("iconst", 1), ("iconst", 2), ("iadd", 3)])
+
+
+def test_parse_unknown_operation():
+    assert parse_ops("args = [1]\niload(0)\niconst(-2)\nimul()\nprint(pop())\n") == [
+        ("iload", 0), ("iconst", -2), ("imul",)]
+    with pytest.raises(ValueError, match="ineg"):
+        parse_ops("iload(0)\nineg()\nprint(pop())\n")  # jvm.py: NameError, а не return a0